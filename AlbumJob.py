@@ -0,0 +1,178 @@
+import os
+import re
+import Engine
+from LocalMatcher import normalize, similarity, short_words
+
+# how alike a file's title and a tracklist entry have to be to suggest the entry when they are not identical,
+# lower than LocalMatcher's threshold since only the album's own tracks are candidates
+MATCH_SCORE = 0.8
+# the most tracks looked up to find out which album an untagged folder holds
+GUESS_LOOKUPS = 3
+
+class AlbumJob:
+    """Holds the files believed to make up one album while they are tagged together."""
+
+    def __init__(self, directory, album_search = None, artist_search = None):
+        """
+        Initializes an album without any tracks.
+
+        Parameters
+        ----------
+        directory: str
+            The folder the album's files are in.
+        album_search: str | None
+            The album title to search for, None if it still has to be guessed.
+        artist_search: str | None
+            The album artist to search for, None if it still has to be guessed.
+        """
+        self.directory = directory
+        self.album_search = album_search
+        self.artist_search = artist_search
+        # a TrackJob per file, filled in for every file matched to the tracklist
+        self.tracks = []
+        # True if the provider returned the album for the search criteria
+        self.found = False
+        # why looking the album up failed, None if nothing went wrong
+        self.error = None
+
+        self.album_title = None
+        self.album_artist = None
+        self.cover = None
+        self.tags = []
+        self.total_tracks = None
+        self.year = None
+        self.mbid = None
+
+    @property
+    def matched(self):
+        return [track for track in self.tracks if track.found]
+
+    @property
+    def unmatched(self):
+        return [track for track in self.tracks if not track.found]
+
+def read_album_tags(job):
+    """Returns the album and album artist in the job's file tags, falling back to the track artist. Empty strings if missing."""
+    album_artist = job.file_tags["albumartist"]
+    if album_artist == "":
+        album_artist = job.file_tags["artist"]
+    return job.file_tags["album"], album_artist
+
+def group_albums(songs):
+    """Returns an AlbumJob per folder, splitting a folder whose files are tagged with different albums."""
+    albums = {}
+    for filepath in songs:
+        # the tags read for the track are reused, so every file is only read once
+        try:
+            job = Engine.prepare_offline(filepath)
+        except Exception as error:
+            # kept with the folder's untagged files and never matched, so it goes to the review queue
+            job = Engine.failed_job(filepath, error)
+        album_title, album_artist = read_album_tags(job) if job.error is None else ("", "")
+        directory = os.path.dirname(os.path.abspath(filepath))
+        key = (directory, normalize(album_title))
+        if key not in albums:
+            albums[key] = AlbumJob(directory, album_title or None, album_artist or None)
+        albums[key].tracks.append(job)
+    return list(albums.values())
+
+def title_guess(job, album_artist):
+    """Returns the track title a file most likely has, from its metadata or its name, e.g. `01 - Title.mp3`."""
+    if job.existing:
+        return job.title
+    # a `Title - Artist.mp3` name by the album's artist, even if the title is a number like `1979 - Smashing Pumpkins.mp3`
+    if job.title_search is not None and normalize(job.artist_search) == normalize(album_artist):
+        return job.title_search
+    name = os.path.splitext(job.filename)[0]
+    # otherwise a leading `NN - ` is most likely the track number, common in album folders
+    name = re.sub(r"^\d+\s*-\s*", "", name)
+    return name.split(" - ")[0]
+
+def guess_album(provider, album):
+    """Fills in whatever album search criteria are missing. Returns True if there is something to search with."""
+    # folders are commonly named `Artist - Album`
+    name = os.path.basename(album.directory)
+    if album.album_search is None and " - " in name:
+        album.artist_search, album.album_search = name.split(" - ", 1)
+    if album.album_search is not None and album.artist_search is not None:
+        return True
+
+    # otherwise ask the provider which album one of the tracks is on
+    lookups = 0
+    for track in album.tracks:
+        if track.title_search is None:
+            continue
+        found = provider.track(track.title_search, track.artist_search)
+        if found is not None and found.album is not None:
+            album.album_search = found.album.title
+            album.artist_search = found.album.artist
+            return True
+        lookups = lookups + 1
+        if lookups >= GUESS_LOOKUPS:
+            break
+    return False
+
+def resolve_album(provider, artwork_store, album):
+    """Looks the album up and fills in every track found on its tracklist. Returns True if the album was found."""
+    if not guess_album(provider, album):
+        return False
+
+    info = provider.album(album.album_search, album.artist_search)
+    if info is None:
+        return False
+
+    album.found = True
+    album.album_title = info.title
+    album.album_artist = info.artist
+    # one cover for the whole album
+    album.cover = artwork_store.get(info.cover_url)
+    album.tags = [tag.lower() for tag in info.tags]
+    album.total_tracks = len(info.tracks) or None
+    album.year = info.year
+    album.mbid = info.mbid
+    match_tracks(album, info.tracks)
+    return True
+
+def match_tracks(album, tracklist):
+    """
+    Pairs each file with at most one tracklist entry by identical title. A file whose title is only close to
+    an entry is not filled in, the entry is offered as its suggestion so it can be confirmed during review.
+    """
+    remaining = list(tracklist)
+    close = []
+    for track in album.tracks:
+        if track.error is not None:
+            continue
+        title = normalize(title_guess(track, album.album_artist))
+        entry = next((entry for entry in remaining if normalize(entry.title) == title), None)
+        if entry is None:
+            close.append((track, title))
+            continue
+        remaining.remove(entry)
+        apply_album_track(album, track, entry)
+
+    for track, title in close:
+        scored = [(similarity(title, normalize(entry.title)), entry) for entry in remaining]
+        if not scored:
+            break
+        score, entry = max(scored, key = lambda pair: pair[0])
+        # a different number or short word usually means a different track, e.g. `Part 1` and `Part 2`
+        if score >= MATCH_SCORE and short_words(title) == short_words(normalize(entry.title)):
+            remaining.remove(entry)
+            track.suggestions = [entry]
+
+def apply_album_track(album, job, entry):
+    """Fills a job from a Track on an album's tracklist and the album it belongs to."""
+    job.found = True
+    job.existing = False
+    job.title = entry.title
+    job.artist = entry.artist
+    job.tags = list(album.tags)
+    job.set_album(album.album_title, album.album_artist, album.cover)
+    job.track_number = entry.number
+    job.total_tracks = album.total_tracks
+    job.year = album.year
+    job.mbids = {}
+    Engine.set_mbid(job, "track", entry.mbid)
+    Engine.set_mbid(job, "artist", entry.artist_mbid)
+    Engine.set_mbid(job, "album", album.mbid)
@@ -1,67 +1,68 @@
 import customtkinter as ctk
 import tkinter
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, UnidentifiedImageError
-from io import BytesIO
+
+THUMBNAIL_SIZE = (100, 100)
+
+# at most this many results are shown
+RESULTS_COUNT = 5
+
+def load_thumbnail(artwork_store, thumbnail_cache, url):
+    """Fetches a cover and decodes it scaled down to thumbnail size, unless it is cached. Runs off the UI thread."""
+    cover = artwork_store.get(url)
+    if cover is None:
+        raise UnidentifiedImageError("empty cover URL")
+    return thumbnail_cache.get(cover, THUMBNAIL_SIZE, artwork_store.get_hash(url))
 
 class AlbumSelection(ctk.CTkFrame):
     """Holds the UI for selecting one album out of multiple choices."""
 
-    def __init__(self, master, title, artist, albums, on_click_continue, on_click_back):
+    def __init__(self, master, artwork_store, thumbnail_cache, on_click_continue, on_click_back):
         """
-        Initializes UI components.
+        Initializes UI components. Call refresh() to fill them in for a search.
 
         Parameters
         ----------
         master: CTk | CTkFrame
             The parent container of this frame.
-        title: str
-            The title of the current track.
-        artist: str
-            The artist of the current track.
-        albums: List[dict]
-            The albums to select from.
+        artwork_store: ArtworkStore
+            Where album covers are fetched from.
+        thumbnail_cache: ThumbnailCache
+            Holds covers that were already decoded and scaled down.
         on_click_continue: Callable[]
             Defines on-click behavior for the continue button.
         on_click_back: Callable[]
             Defines on-click behavior for the back button.
         """
         super().__init__(master)
+        self.artwork_store = artwork_store
+        self.thumbnail_cache = thumbnail_cache
 
         # center items horizontally
         self.columnconfigure(index = 0, weight = 1)
 
-        self.message_label = ctk.CTkLabel(master = self, text = f"The current track is {title} by {artist}. Please choose an album or search again.")
+        self.message_label = ctk.CTkLabel(master = self, text = "")
         self.message_label.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "w")
 
         self.sub_frame = ctk.CTkFrame(self)
         self.sub_frame.grid(row = 1, column = 0, padx = 20, pady = 20, sticky = "ew")
 
-        # show at most 5 results
-        results_count = 5
-        if len(albums) < 5:
-                results_count = len(albums)
-
         # choose first album by default
         self.album_index = tkinter.IntVar(value = 0)
 
-        row_counter = 0
-        for i in range(results_count):
-            radio_button = ctk.CTkRadioButton(self.sub_frame, text = f"{albums[i]['name']} by {albums[i]['artist']}", variable = self.album_index, value = i)
+        # one row per possible result, reused for every search
+        self.placeholder = ctk.CTkImage(light_image = Image.new("RGB", THUMBNAIL_SIZE, "grey"), size = THUMBNAIL_SIZE)
+        self.rows = []
+        for i in range(RESULTS_COUNT):
+            radio_button = ctk.CTkRadioButton(self.sub_frame, text = "", variable = self.album_index, value = i)
+            cover_image = ctk.CTkLabel(master = self.sub_frame, image = self.placeholder, text = "", compound = "center")
+            self.rows.append((cover_image, radio_button))
 
-            # grab and display album cover
-            try:
-                response = requests.get(albums[i]["image"][-1]["#text"])
-                cover = Image.open(BytesIO(response.content))
-            except (requests.exceptions.MissingSchema, UnidentifiedImageError):
-                # invalid or empty URL from last.fm
-                continue
-            image = ctk.CTkImage(light_image = cover, size = (100, 100))
-            cover_image = ctk.CTkLabel(master = self.sub_frame, image = image, text = "")
-
-            cover_image.grid(row = row_counter, column = 0, padx = 20, pady = 5)
-            radio_button.grid(row = row_counter, column = 1, padx = 20, pady = 5, sticky = "w")
-            row_counter = row_counter + 1
+        # covers are fetched and decoded in parallel, placeholders are shown until each one arrives
+        self.executor = ThreadPoolExecutor(max_workers = RESULTS_COUNT, thread_name_prefix = "thumbnail")
+        self.pending_thumbnails = {}
+        self.poll_id = None
 
         self.button_sub_frame = ctk.CTkFrame(self)
         self.button_sub_frame.grid(row = 2, column = 0, padx = 20, pady = (0, 20))
@@ -72,5 +73,76 @@ class AlbumSelection(ctk.CTkFrame):
         self.continue_button = ctk.CTkButton(master = self.button_sub_frame, text = "continue", command = on_click_continue)
         self.continue_button.grid(row = 0, column = 1, padx = 20, pady = 20)
 
+    def refresh(self, title, artist, albums):
+        """
+        Updates the page in place instead of building a new one.
+
+        Parameters
+        ----------
+        title: str
+            The title of the current track.
+        artist: str
+            The artist of the current track.
+        albums: List[Album]
+            The albums to select from, as a Provider returns them.
+        """
+        self.message_label.configure(text = f"The current track is {title} by {artist}. Please choose an album or search again.")
+        self.album_index.set(0)
+
+        # covers still loading for a previous search are no longer wanted
+        for future in self.pending_thumbnails:
+            future.cancel()
+        self.pending_thumbnails = {}
+
+        results_count = min(len(albums), RESULTS_COUNT)
+        for i, (cover_image, radio_button) in enumerate(self.rows):
+            if i >= results_count:
+                cover_image.grid_remove()
+                radio_button.grid_remove()
+                continue
+
+            radio_button.configure(text = f"{albums[i].title} by {albums[i].artist}")
+            cover_image.configure(image = self.placeholder, text = "loading...")
+            cover_image.grid(row = i, column = 0, padx = 20, pady = 5)
+            radio_button.grid(row = i, column = 1, padx = 20, pady = 5, sticky = "w")
+
+            # covers seen before on this screen are shown straight away
+            url = albums[i].cover_url
+            sha256 = self.artwork_store.get_hash(url)
+            thumbnail = None if sha256 is None else self.thumbnail_cache.peek(sha256, THUMBNAIL_SIZE)
+            if thumbnail is not None:
+                cover_image.configure(image = ctk.CTkImage(light_image = thumbnail, size = THUMBNAIL_SIZE), text = "")
+                continue
+
+            future = self.executor.submit(load_thumbnail, self.artwork_store, self.thumbnail_cache, url)
+            self.pending_thumbnails[future] = cover_image
+
+        if self.pending_thumbnails and self.poll_id is None:
+            self.poll_id = self.after(50, self.poll_thumbnails)
+
+    def poll_thumbnails(self):
+        """Swaps placeholders for covers that finished loading. Tk widgets may only be touched from the UI thread."""
+        for future in [future for future in self.pending_thumbnails if future.done()]:
+            cover_image = self.pending_thumbnails.pop(future)
+            try:
+                cover = future.result()
+            except Exception:
+                # invalid URL, unreadable file, or no cover at all; raising here would stop polling for the other covers
+                cover_image.configure(text = "no cover")
+                continue
+            cover_image.configure(image = ctk.CTkImage(light_image = cover, size = THUMBNAIL_SIZE), text = "")
+
+        if self.pending_thumbnails:
+            self.poll_id = self.after(50, self.poll_thumbnails)
+        else:
+            self.poll_id = None
+
+    def destroy(self):
+        if self.poll_id is not None:
+            self.after_cancel(self.poll_id)
+            self.poll_id = None
+        self.executor.shutdown(wait = False, cancel_futures = True)
+        super().destroy()
+
     def get_album_index(self):
         return self.album_index.get()
@@ -0,0 +1,628 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+import customtkinter as ctk
+import requests
+from HttpClient import HttpClient
+from LastFM import LastFM
+from Provider import ProviderChain, ProviderError
+from LastFMProvider import LastFMProvider
+from LocalProvider import LocalProvider
+from ResponseCache import ResponseCache
+from ArtworkStore import ArtworkStore
+from ArtworkNormalizer import ArtworkNormalizer
+from LibraryIndex import LibraryIndex
+from LocalMatcher import LocalMatcher
+from Scanner import Scanner
+from MetadataWriter import MetadataWriter
+from Prefetcher import Prefetcher
+from PreScan import PreScan, SCAN_ORDER, order_songs
+from Instrumentation import instrumentation
+from SessionJournal import SessionJournal, save_job, load_job, TRACK_CONFIRMED, TAGS_SELECTED
+import Engine
+from WelcomePage import WelcomePage
+
+# failures looking up tracks or downloading covers that should not end a GUI session
+LOOKUP_ERRORS = (requests.RequestException, ProviderError)
+
+class Application(ctk.CTk):
+    """The base application class for CTkinter that holds the entire UI."""
+
+    def __init__(self, key, cache_directory, review_queue_path = None, process_all = False, cover_size = 600, cover_quality = 85, trace_path = None, order = SCAN_ORDER, catalog_path = None, offline = False):
+        """Initializes window size, title, caches, and display welcome page."""
+        super().__init__()
+        self.key = key
+        self.cache_directory = cache_directory
+        self.review_queue_path = review_queue_path
+        self.process_all = process_all
+        self.trace_path = trace_path
+        # the order files are worked through in, one of PreScan.ORDERS
+        self.order = order
+        self.library_index = LibraryIndex(os.path.join(cache_directory, "library.sqlite3"))
+        self.client = HttpClient()
+        self.response_cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+        # a local catalog answers before last.fm, or instead of it when offline
+        self.catalog = None if catalog_path is None else LocalProvider(catalog_path)
+        providers = [] if self.catalog is None else [self.catalog]
+        if not offline:
+            providers.append(LastFMProvider(LastFM(key, self.client, cache = self.response_cache)))
+        self.provider = ProviderChain(providers)
+        self.artwork_store = ArtworkStore(os.path.join(cache_directory, "artwork"), self.client)
+        # filled in the background so a large cache does not delay the window
+        self.matcher = LocalMatcher()
+        threading.Thread(target = self.matcher.load, args = (self.library_index, self.response_cache, self.catalog), daemon = True).start()
+
+        self.geometry("800x800")
+        self.title("TrackTagger")
+        self.grid_columnconfigure(0, weight = 1)
+
+        # files are written in the background, progress and failures are reported here
+        normalizer = None
+        if cover_size > 0:
+            normalizer = ArtworkNormalizer(self.artwork_store, cover_size, cover_quality)
+        self.writer = MetadataWriter(self.library_index, normalizer)
+        self.write_failures = []
+        # the after() id of a write waiting for a free slot, None if there is none
+        self.write_retry_id = None
+        # the album picked on AlbumSelection is looked up here so the window stays responsive, one at a time
+        self.album_executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "album")
+        self.album_lookup = None
+        self.last_error = None
+        # sorts the files found before they are worked on, None until a directory is chosen
+        self.pre_scan = None
+        self.classifications = {}
+        # shown in the status line while the current song is displayed
+        self.notice = None
+        # every step of the session is journaled so it can be resumed after a crash
+        self.journal = None
+        self.resume_state = None
+        self.session_complete = False
+        self.status_label = ctk.CTkLabel(master = self, text = "", anchor = "w", justify = "left")
+        self.status_label.grid(row = 1, column = 0, padx = 20, pady = (0, 20), sticky = "w")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_writer()
+
+        # every page is built once, the first time it is shown, and updated in place from then on
+        self.current_page = None
+        self.welcome_page = WelcomePage(self, self.on_click_continue_welcome_page)
+        self.message_page = ctk.CTkLabel(master = self, text = "")
+
+        self.display_welcome_page()
+
+    # the pages after the welcome page, and the modules behind them, are only loaded when first needed
+    @cached_property
+    def thumbnail_cache(self):
+        from ThumbnailCache import ThumbnailCache
+        return ThumbnailCache()
+
+    @cached_property
+    def search_track(self):
+        from SearchTrack import SearchTrack
+        return SearchTrack(self, self.on_click_update_search_track, self.on_click_search_search_track)
+
+    @cached_property
+    def track_confirmation(self):
+        from TrackConfirmation import TrackConfirmation
+        return TrackConfirmation(self, self.on_click_yes_track_confirmation, self.on_click_no_track_confirmation)
+
+    @cached_property
+    def tag_selection(self):
+        from TagSelection import TagSelection
+        return TagSelection(self, self.on_click_continue_tag_selection)
+
+    @cached_property
+    def album_confirmation(self):
+        from AlbumConfirmation import AlbumConfirmation
+        return AlbumConfirmation(self, self.thumbnail_cache, self.on_click_yes_album_confirmation, self.on_click_no_album_confirmation)
+
+    @cached_property
+    def album_search(self):
+        from SearchAlbum import SearchAlbum
+        return SearchAlbum(self, self.on_click_update_album_search, self.on_click_search_album_search)
+
+    @cached_property
+    def album_selection(self):
+        from AlbumSelection import AlbumSelection
+        return AlbumSelection(self, self.artwork_store, self.thumbnail_cache, self.on_click_continue_album_selection, self.on_click_back_album_selection)
+
+    @cached_property
+    def manual_album_update(self):
+        from ManualAlbumUpdate import ManualAlbumUpdate
+        return ManualAlbumUpdate(self, self.on_click_update_manual_album_update, self.on_click_back_manual_album_update)
+
+    def show_page(self, page):
+        """Swaps the displayed page for another one that was built earlier."""
+        if self.current_page is not None and self.current_page is not page:
+            self.current_page.grid_remove()
+        page.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
+        self.current_page = page
+
+    def show_message(self, text, font = None):
+        """Displays a plain message in place of a page."""
+        self.message_page.configure(text = text, font = font)
+        self.show_page(self.message_page)
+
+    def display_search_track(self, title, artist, invalid = False):
+        """Shows the search track page for the current job."""
+        self.search_track.refresh(title, artist, self.job.filename, invalid = invalid, suggestions = self.job.suggestions)
+        self.show_page(self.search_track)
+
+    def display_track_confirmation(self, title, artist, playcount):
+        """Shows the track confirmation page for the current job."""
+        self.track_confirmation.refresh(title, artist, playcount, self.job.corrected_from)
+        self.show_page(self.track_confirmation)
+
+    def display_tag_selection(self):
+        """Shows the tag selection page for the current job."""
+        self.tag_selection.refresh(self.job.title, self.job.artist, self.job.tags, self.allowed_tags, self.denied_tags)
+        self.show_page(self.tag_selection)
+
+    def display_album_search(self, invalid = False):
+        """Shows the album search page for the current job."""
+        self.album_search.refresh(self.job.title, self.job.artist, invalid = invalid)
+        self.show_page(self.album_search)
+
+    def display_manual_album_update(self, invalid = False, invalid_path = False):
+        """Shows the manual album update page for the current job."""
+        self.manual_album_update.refresh(self.job.title, self.job.artist, self.job.album_title, invalid = invalid, invalid_path = invalid_path)
+        self.show_page(self.manual_album_update)
+
+    def on_close(self):
+        """Finishes any queued writes before closing the window."""
+        self.status_label.configure(text = "Finishing writes...")
+        self.update_idletasks()
+        if self.write_retry_id is not None:
+            self.after_cancel(self.write_retry_id)
+        # an album still being looked up is never written, its song is shown again when the session is resumed
+        self.album_executor.shutdown(wait = False, cancel_futures = True)
+        self.writer.close()
+        self.handle_write_results()
+        if self.pre_scan is not None:
+            self.pre_scan.shutdown()
+        if self.trace_path is not None:
+            instrumentation.export(self.trace_path)
+        if self.journal is not None:
+            # failed writes stay in the journal, so a resumed session tries them again
+            if self.session_complete and not self.write_failures:
+                self.journal.finish()
+            else:
+                self.journal.close()
+        self.destroy()
+
+    # WelcomePage
+    def display_welcome_page(self, invalid_directory = False):
+        """Displays a frame to collect the directory path and tag lists."""
+        self.welcome_page.refresh(invalid_directory = invalid_directory)
+        self.show_page(self.welcome_page)
+
+    def on_click_continue_welcome_page(self):
+        """Collects data from welcome page and begins processing data."""
+        self.directory_path = self.welcome_page.get_directory_path()
+        
+        # need to provide a directory, cannot be blank
+        if self.directory_path == "":
+            self.display_welcome_page(invalid_directory = True)
+            return
+
+        # user omitted the trailing slash, add it
+        if self.directory_path[-1] != '/':
+            self.directory_path += '/'
+        
+        # check if it is a valid directory
+        if not os.path.isdir(self.directory_path):
+            self.display_welcome_page(invalid_directory = True)
+            return
+            
+        self.allowed_tags = set(self.welcome_page.get_allowed_tags().split(", "))
+        self.denied_tags = set(self.welcome_page.get_denied_tags().split(", "))
+
+        # a session over the same directory that was cut short is picked up where it stopped
+        journal_path = SessionJournal.path_for(self.cache_directory, self.directory_path, self.review_queue_path)
+        state = SessionJournal.replay(journal_path)
+        self.journal = SessionJournal(journal_path)
+
+        # files found by the scanner are classified by the pre-scan, then added to the list to be processed
+        self.song_list = []
+        self.known_songs = set()
+        self.song_index = 0
+        self.prefetcher = Prefetcher(self.provider, self.artwork_store, self.song_list, matcher = self.matcher)
+        self.pre_scan = PreScan()
+        self.classified = []
+        self.scan_finished = False
+        self.waiting_for_songs = True
+        self.show_message("Looking for mp3 files...")
+        if state is not None:
+            self.resume_session(state)
+
+        self.scanner = None
+        if self.review_queue_path is not None:
+            # only revisit files the batch mode could not handle on its own
+            from Batch import read_review_queue
+            directory_path = os.path.abspath(self.directory_path)
+            # compared by path component, so /music does not take in /music2
+            self.queue_songs([path for path in read_review_queue(self.review_queue_path) if os.path.commonpath([os.path.abspath(path), directory_path]) == directory_path])
+        elif state is None or not state.scanned:
+            self.scanner = Scanner(self.directory_path).start()
+        self.poll_scanner()
+
+    def resume_session(self, state):
+        """Restores the song list, position, and unfinished writes of a session that was cut short."""
+        print(f"resuming session: {state.index} of {len(state.songs)} songs done")
+        self.allowed_tags |= state.allowed_tags
+        self.song_list.extend(state.songs)
+        self.known_songs.update(state.songs)
+        self.song_index = state.index
+        self.resume_state = state
+
+        for saved in state.pending_writes.values():
+            # a write that finished just before the crash has already moved the file
+            if os.path.isfile(saved["filepath"]):
+                self.writer.submit(load_job(saved, self.artwork_store))
+
+    def poll_scanner(self):
+        """Moves newly found songs through the pre-scan into the song list, polling again until both are finished."""
+        if self.scanner is not None:
+            self.queue_songs(self.scanner.poll())
+        classified = self.pre_scan.poll()
+        self.classifications.update((classification.path, classification) for classification in classified)
+        self.classified.extend(classified)
+        self.scan_finished = (self.scanner is None or self.scanner.done) and self.pre_scan.done
+
+        # in scan order songs are worked on as soon as they are classified, other orders need every file first
+        if self.order == SCAN_ORDER or self.scan_finished:
+            songs = order_songs(self.classified, self.order)
+            self.classified = []
+            self.add_songs(songs)
+        if self.waiting_for_songs:
+            self.show_message(f"Looking for mp3 files...\n{self.pre_scan.summary()}")
+
+        if self.scan_finished:
+            print(self.pre_scan.summary())
+            self.pre_scan.shutdown()
+            self.journal.append("scanned")
+        else:
+            self.after(50, self.poll_scanner)
+
+    def queue_songs(self, songs):
+        """Hands songs that still need processing to the pre-scan."""
+        # files tagged in an earlier session are skipped unless they changed since
+        if not self.process_all:
+            songs = self.library_index.filter_pending(songs)
+        # a resumed session already knows the songs found before it stopped
+        songs = [song for song in songs if song not in self.known_songs]
+        self.known_songs.update(songs)
+        self.pre_scan.submit(songs)
+
+    def add_songs(self, songs):
+        """Appends classified songs to the list to be processed and starts on the first one if nothing is displayed yet."""
+        if songs:
+            self.song_list.extend(songs)
+            self.journal.append("songs", paths = songs)
+        self.prefetcher.prefetch(self.song_index)
+
+        if self.waiting_for_songs and (self.song_index < len(self.song_list) or self.scan_finished):
+            self.waiting_for_songs = False
+            self.process_song(None)
+
+    # SearchTrack
+    def on_click_search_search_track(self):
+        """Collects data from the search track page and begins processing a song."""
+        self.process_song(self.search_track)
+
+    def on_click_update_search_track(self):
+        """Collects data from the search track page and sets the title and artist. Moves immediately to album search."""
+        self.job.title = self.search_track.get_title()
+        self.job.artist = self.search_track.get_artist()
+
+        # check for invalid input
+        if self.job.title == "" or self.job.artist == "":
+            self.display_search_track("", "", invalid = True)
+            return
+
+        # typed in by hand, so nothing from a track found earlier applies, including its MusicBrainz IDs
+        self.job.tags = []
+        self.job.playcount = -1
+        self.job.mbids = {}
+        self.job.set_album(None, None, None)
+        self.journal.append("decided", stage = TRACK_CONFIRMED, job = save_job(self.job, self.artwork_store))
+        self.display_tag_selection()
+
+    # TrackConfirmation
+    def on_click_yes_track_confirmation(self):
+        """Moves from the track confirmation dialog to the tag dialog."""
+        self.journal.append("decided", stage = TRACK_CONFIRMED, job = save_job(self.job, self.artwork_store))
+        self.display_tag_selection()
+
+    def on_click_no_track_confirmation(self):
+        """Moves from the track confirmation dialog to the search track dialog."""
+        self.display_search_track(self.title_search, self.artist_search)
+
+    # TagSelection
+    def on_click_continue_tag_selection(self):
+        """Collects data from the tag selection dialog and proceeds to album selection."""
+        self.job.tags = self.tag_selection.get_selected_tags()
+
+        # add tags to the allowed list so they are auto-selected in the future
+        for tag in self.job.tags:
+            self.allowed_tags.add(tag)
+        self.journal.append("decided", stage = TAGS_SELECTED, job = save_job(self.job, self.artwork_store), allowed_tags = self.job.tags)
+        self.display_album_step()
+
+    def display_album_step(self):
+        """Asks the user to confirm the album that was found, or to search for one if it found none."""
+        if self.job.album_found:
+            self.album_confirmation.refresh(
+                self.job.title,
+                self.job.artist,
+                self.job.album_title,
+                self.job.album_artist,
+                self.job.cover
+            )
+            self.show_page(self.album_confirmation)
+        else:
+            self.display_album_search()
+
+    # AlbumConfirmation
+    def on_click_yes_album_confirmation(self):
+        """Writes out metadata for the current track."""
+        self.write_out_metadata()
+
+    def on_click_no_album_confirmation(self):
+        """Goes back to AlbumSearch."""
+        self.display_album_search()
+
+    # AlbumSearch
+    def on_click_update_album_search(self):
+        """Uses the entered album title as is and asks for the rest of the album information."""
+        album_title = self.album_search.get_title()
+
+        if album_title == "":
+            self.display_album_search(invalid = True)
+            return
+
+        self.job.set_album(album_title, None, None)
+        self.display_manual_album_update()
+
+    def on_click_search_album_search(self):
+        """Calls SearchAlbum or AlbumSelection depending on the input."""
+        album_title_search = self.album_search.get_title()
+
+        if album_title_search == "":
+            self.display_album_search(invalid = True)
+            return
+
+        try:
+            self.albums = self.provider.search_albums(album_title_search)
+        except LOOKUP_ERRORS as error:
+            self.report_error("searching for albums", error)
+            self.display_album_search(invalid = True)
+            return
+        
+        # no albums found for given search criteria
+        if not self.albums:
+            self.display_album_search(invalid = True)
+            return
+
+        self.album_selection.refresh(self.job.title, self.job.artist, self.albums)
+        self.show_page(self.album_selection)
+
+    # ManualAlbumUpdate
+    def on_click_update_manual_album_update(self):
+        """Verifies provided album artist and cover path are valid, then writes out metadata."""
+        self.job.album_artist = self.manual_album_update.get_album_artist()
+        album_cover_path = self.manual_album_update.get_album_cover_path()
+
+        if self.job.album_artist == "" or album_cover_path == "":
+            self.display_manual_album_update(invalid = True)
+            return
+
+        # figure out if album cover path is actually an image file
+        if not os.path.isfile(album_cover_path) or not album_cover_path.lower().endswith((".jpg", ".png", ".jpeg")):
+            self.display_manual_album_update(invalid_path = True)
+            return
+
+        with open(album_cover_path, 'rb') as image:
+            self.job.cover = image.read()
+            self.write_out_metadata()
+               
+    def on_click_back_manual_album_update(self):
+        """Goes back to the SearchAlbum screen."""
+        self.display_album_search()
+
+    # AlbumSelection
+    def on_click_continue_album_selection(self):
+        """Looks up the album picked in the background, then writes out metadata for the current track."""
+        # the page stays clickable while the album is looked up, another click must not look it up twice
+        if self.album_lookup is not None:
+            return
+        self.album_index = self.album_selection.get_album_index()
+
+        self.show_message("Looking up the album...")
+        self.album_lookup = self.album_executor.submit(self.look_up_album, self.albums[self.album_index])
+        self.after(50, self.poll_album_lookup)
+
+    def look_up_album(self, album):
+        """Returns the cover of an album and its album.getInfo Album, with the errors that kept either from being found."""
+        errors = []
+        cover = None
+        info = None
+        try:
+            cover = self.artwork_store.get(album.cover_url)
+        except LOOKUP_ERRORS as error:
+            errors.append(("downloading the album cover", error))
+        # the track number and year belong to the album, look them up for the one picked
+        try:
+            info = self.provider.album(album.title, album.artist)
+        except LOOKUP_ERRORS as error:
+            errors.append(("looking up the album", error))
+        return album, cover, info, errors
+
+    def poll_album_lookup(self):
+        """Saves the album information once it has been looked up and writes out metadata for the current track."""
+        if not self.album_lookup.done():
+            self.after(50, self.poll_album_lookup)
+            return
+        album, cover, info, errors = self.album_lookup.result()
+        self.album_lookup = None
+
+        # the rest of the album is known, it is written without what could not be found
+        for action, error in errors:
+            self.report_error(action, error)
+        self.job.set_album(album.title, album.artist, cover)
+        Engine.apply_album_info(self.job, info)
+        self.write_out_metadata()
+
+    def on_click_back_album_selection(self):
+        """Goes back to the SearchAlbum screen."""
+        self.display_album_search()
+
+    # Utility
+    def process_song(self, search_track):
+        """First, checks to see if there is existing metadata. Next, looks up track info based on title and artist."""
+
+        # the scanner has not caught up yet, add_songs continues once it has
+        if self.song_index >= len(self.song_list) and not self.scan_finished:
+            self.waiting_for_songs = True
+            self.show_message("Looking for more mp3 files...")
+            return
+
+        # check to see if there are no more songs to handle
+        if self.song_index >= len(self.song_list):
+            self.session_complete = True
+            self.prefetcher.shutdown()
+            print(instrumentation.report())
+            self.show_message("Thank you for using TrackTagger!", font = ("", 20))
+            return
+
+        # no search, touching this particular track for the first time
+        if search_track is None:
+            # a resumed session continues with the song it stopped on, from the last decision made
+            if self.resume_state is not None:
+                state = self.resume_state
+                self.resume_state = None
+                if state.job is not None:
+                    self.job = load_job(state.job, self.artwork_store)
+                    self.title_search = self.job.title_search
+                    self.artist_search = self.job.artist_search
+                    if state.job_stage == TRACK_CONFIRMED:
+                        self.display_tag_selection()
+                    else:
+                        self.display_album_step()
+                    return
+
+            # the job for this song was prepared in the background while earlier songs were displayed
+            try:
+                self.job = self.prefetcher.get(self.song_index)
+            except Exception as error:
+                # a failed lookup or a file whose tags cannot be read, the filename is all there is to go on;
+                # raising here would end the Tk callback and leave the window stuck
+                self.report_error("looking up " + os.path.basename(self.song_list[self.song_index]), error)
+                self.job = Engine.TrackJob(self.song_list[self.song_index])
+                Engine.parse_filename(self.job)
+                self.display_search_track(self.job.title_search or "", self.job.artist_search or "")
+                return
+
+            # the pre-scan found tags naming a different track than the filename, worth a second look
+            classification = self.classifications.get(self.job.filepath)
+            self.notice = None
+            if classification is not None and classification.mismatch:
+                self.notice = f"the tags of {self.job.filename} name a different track than its filename"
+
+            # if present, no need to search, just ask user to verify
+            if self.job.existing:
+                self.title_search = self.job.title
+                self.artist_search = self.job.artist
+                self.display_track_confirmation(self.job.title, self.job.artist, -1)
+                return
+
+            # filename is not formatted for a search
+            if self.job.title_search is None:
+                self.display_search_track("", "")
+                return
+        # we got here because the user entered some criteria on SearchTrack
+        else:
+            title_search = search_track.get_title()
+            artist_search = search_track.get_artist()
+
+            if title_search == "" or artist_search == "":
+                self.display_search_track(title_search, artist_search, invalid = True)
+                return
+
+            # ready to look the track up, exactly as typed
+            self.job.corrected_from = None
+            try:
+                Engine.resolve(self.provider, self.artwork_store, self.job, title_search, artist_search)
+            except LOOKUP_ERRORS as error:
+                self.report_error("looking up the track", error)
+                self.display_search_track(title_search, artist_search, invalid = True)
+                return
+            Engine.learn(self.matcher, self.job)
+
+        self.title_search = self.job.title_search
+        self.artist_search = self.job.artist_search
+        if not self.job.found:
+            # no track found, must search 
+            self.display_search_track(self.title_search, self.artist_search)
+            return
+
+        # display confirmation page for this track
+        self.display_track_confirmation(self.job.title, self.job.artist, self.job.playcount)
+
+    def write_out_metadata(self):
+        """Queues saved data to be written into the metadata of the current track file and moves on to the next track."""
+        # too many writes are queued, wait for a slot rather than blocking the UI; the page stays clickable,
+        # so another click while waiting must not queue the job a second time
+        if self.writer.full():
+            if self.write_retry_id is None:
+                self.status_label.configure(text = "Waiting for earlier files to finish writing...")
+                self.write_retry_id = self.after(100, self.retry_write_out_metadata)
+            return
+
+        self.journal.append("queued", index = self.song_index, job = save_job(self.job, self.artwork_store))
+        self.writer.submit(self.job)
+        self.song_index = self.song_index + 1
+        self.process_song(None)
+
+    def retry_write_out_metadata(self):
+        self.write_retry_id = None
+        self.write_out_metadata()
+
+    def report_error(self, action, error):
+        """Shows a failed lookup in the status line instead of letting it end the session."""
+        self.last_error = f"{action} failed: {Engine.describe_error(error)}"
+        print(self.last_error)
+
+    def handle_write_results(self):
+        """Records writes finished since the last call."""
+        for result in self.writer.poll():
+            if result.error is not None:
+                # left pending in the journal, so a resumed session tries again
+                print(f"failed to write {result.previous_path}: {result.error}")
+                self.write_failures.append(result)
+            else:
+                if self.journal is not None:
+                    self.journal.append("written", path = result.previous_path)
+                # titles typed in by hand are suggested from now on too
+                self.matcher.add(result.job.title, result.job.artist, result.job.album_title)
+
+    def poll_writer(self):
+        """Reports finished and failed writes in the status line, for as long as the window is open."""
+        self.handle_write_results()
+
+        status = []
+        if self.pre_scan is not None and self.song_list:
+            status.append(f"song {min(self.song_index + 1, len(self.song_list))} of {len(self.song_list)}")
+        if self.notice is not None:
+            status.append(self.notice)
+        if self.writer.pending > 0:
+            status.append(f"{self.writer.pending} writing")
+        if self.writer.written > 0:
+            status.append(f"{self.writer.written} written")
+        if self.write_failures:
+            last = self.write_failures[-1]
+            status.append(f"{len(self.write_failures)} failed, last: {os.path.basename(last.previous_path)} ({last.error})")
+        if self.last_error is not None:
+            status.append(self.last_error)
+        self.status_label.configure(text = ", ".join(status))
+        self.after(200, self.poll_writer)
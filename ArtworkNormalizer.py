@@ -0,0 +1,66 @@
+import hashlib
+from io import BytesIO
+from PIL import Image, ImageOps, UnidentifiedImageError
+from Instrumentation import instrumentation
+
+class ArtworkNormalizer:
+    """Shrinks and recompresses covers before they are embedded, caching the result per source image."""
+
+    def __init__(self, artwork_store, max_size = 600, quality = 85):
+        """
+        Initializes the pipeline.
+
+        Parameters
+        ----------
+        artwork_store: ArtworkStore
+            Where normalized covers are cached, keyed by the SHA-256 of the source image and these settings.
+        max_size: int
+            The largest width or height of an embedded cover. Smaller covers are not scaled up.
+        quality: int
+            The JPEG quality, from 1 to 95.
+        """
+        self.artwork_store = artwork_store
+        self.max_size = max_size
+        self.quality = quality
+        # covers cached before they were turned upright are not reused
+        self.variant = f"jpeg-{max_size}-{quality}-upright"
+
+    def normalize(self, cover):
+        """Returns the cover as a progressive JPEG no larger than max_size, without EXIF. Returns the input if it cannot be decoded."""
+        if cover is None:
+            return None
+
+        source_hash = hashlib.sha256(cover).hexdigest()
+        normalized = self.artwork_store.get_derived(source_hash, self.variant)
+        if normalized is not None:
+            return normalized
+
+        with instrumentation.span("normalize"):
+            normalized = self.encode(cover)
+        if normalized is not cover:
+            self.artwork_store.add_derived(source_hash, self.variant, normalized)
+        return normalized
+
+    def encode(self, cover):
+        """Does the decoding, scaling, and encoding for normalize(). Returns the input if it cannot be decoded."""
+        try:
+            image = Image.open(BytesIO(cover))
+            # the EXIF orientation is dropped below, so turn the pixels the way it says first
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((self.max_size, self.max_size), Image.Resampling.LANCZOS)
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG has no transparency, flatten onto white like most players would show it
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask = image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+        except (UnidentifiedImageError, OSError) as exception:
+            print(f"could not normalize cover: {exception}")
+            return cover
+
+        output = BytesIO()
+        # no exif argument, so none of the source's metadata is carried over
+        image.save(output, format = "JPEG", quality = self.quality, progressive = True, optimize = True)
+        return output.getvalue()
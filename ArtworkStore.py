@@ -0,0 +1,180 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from Instrumentation import instrumentation
+
+class ArtworkStore:
+    """Content-addressed store for album covers, shared by every track and screen that shows or embeds one."""
+
+    def __init__(self, directory, client, memory_bytes = 32 * 1024 * 1024):
+        """
+        Opens (or creates) the store.
+
+        Parameters
+        ----------
+        directory: str
+            Where cover files and the URL index are kept. Covers are stored once per SHA-256 of their bytes.
+        client: HttpClient
+            The shared client covers are downloaded through.
+        memory_bytes: int
+            The total size of covers kept in memory before least recently used ones are dropped.
+        """
+        self.directory = directory
+        self.client = client
+        os.makedirs(self.directory, exist_ok = True)
+        self.memory_bytes = memory_bytes
+        self.downloads = 0
+
+        self.lock = threading.Lock()
+        # sha256 -> bytes, each distinct cover is held once no matter how many URLs point at it
+        self.memory = OrderedDict()
+        self.memory_size = 0
+        # url -> sha256
+        self.hashes = {}
+        # url -> Future, so concurrent requests for one cover share a single download
+        self.in_flight = {}
+
+        self.connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread = False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL)")
+        # covers produced from other covers, e.g. resized copies
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS derived (
+                source TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                PRIMARY KEY (source, variant)
+            )
+        """)
+        self.connection.commit()
+
+    def get(self, url):
+        """Returns the cover bytes for the URL, downloading them only if no copy exists yet. Returns None for an empty or missing URL, or if the server did not send a cover."""
+        if not url:
+            return None
+
+        sha256 = self.get_hash(url)
+        if sha256 is not None:
+            cover = self.load(sha256)
+            if cover is not None:
+                return cover
+
+        with self.lock:
+            future = self.in_flight.get(url)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[url] = future
+        if not owner:
+            return future.result()
+
+        try:
+            cover = self.download(url)
+            future.set_result(cover)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[url]
+        return cover
+
+    def get_hash(self, url):
+        """Returns the SHA-256 of the cover at the URL if it has been stored before, otherwise None."""
+        with self.lock:
+            sha256 = self.hashes.get(url)
+            if sha256 is None:
+                row = self.connection.execute("SELECT sha256 FROM urls WHERE url = ?", (url,)).fetchone()
+                if row is not None:
+                    sha256 = row[0]
+                    self.hashes[url] = sha256
+        return sha256
+
+    def load(self, sha256):
+        """Returns the cover with the given hash from memory or disk, or None if it is not stored."""
+        with self.lock:
+            if sha256 in self.memory:
+                self.memory.move_to_end(sha256)
+                return self.memory[sha256]
+
+        try:
+            with open(self.path_for(sha256), "rb") as file:
+                cover = file.read()
+        except FileNotFoundError:
+            return None
+        self.remember(sha256, cover)
+        return cover
+
+    def add(self, cover, url = None):
+        """Stores cover bytes, optionally under a URL, and returns their SHA-256."""
+        sha256 = hashlib.sha256(cover).hexdigest()
+        path = self.path_for(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok = True)
+            temporary_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "wb") as file:
+                file.write(cover)
+            os.replace(temporary_path, path)
+
+        self.remember(sha256, cover)
+        if url is not None:
+            with self.lock:
+                self.hashes[url] = sha256
+                self.connection.execute("INSERT OR REPLACE INTO urls (url, sha256) VALUES (?, ?)", (url, sha256))
+                self.connection.commit()
+        return sha256
+
+    def get_derived(self, source_sha256, variant):
+        """Returns the stored variant of the cover with the given hash, or None if it was never made."""
+        with self.lock:
+            row = self.connection.execute("SELECT sha256 FROM derived WHERE source = ? AND variant = ?", (source_sha256, variant)).fetchone()
+        if row is None:
+            return None
+        return self.load(row[0])
+
+    def add_derived(self, source_sha256, variant, cover):
+        """Stores a variant of the cover with the given hash and returns the variant's SHA-256."""
+        sha256 = self.add(cover)
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO derived (source, variant, sha256) VALUES (?, ?, ?)", (source_sha256, variant, sha256))
+            self.connection.commit()
+        return sha256
+
+    def download(self, url):
+        # local catalogs may point at covers on disk rather than on the web
+        if "://" not in url:
+            with open(url, "rb") as file:
+                cover = file.read()
+            self.add(cover, url)
+            return cover
+        with instrumentation.span("download", url = url):
+            response = self.client.get(url)
+        instrumentation.count("covers.downloaded")
+        with self.lock:
+            self.downloads += 1
+        # error pages are neither remembered nor embedded, the track is written without a cover instead
+        if not response.ok:
+            return None
+        self.add(response.content, url)
+        return response.content
+
+    def remember(self, sha256, cover):
+        """Keeps a cover in memory, dropping least recently used ones beyond memory_bytes."""
+        with self.lock:
+            if sha256 in self.memory:
+                self.memory.move_to_end(sha256)
+                return
+            self.memory[sha256] = cover
+            self.memory_size += len(cover)
+            while self.memory_size > self.memory_bytes and len(self.memory) > 1:
+                _, evicted = self.memory.popitem(last = False)
+                self.memory_size -= len(evicted)
+
+    def path_for(self, sha256):
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,221 @@
+import asyncio
+import random
+import time
+import aiohttp
+from LastFM import ENDPOINT, TEMPORARY_ERRORS, LastFMError
+from ResponseCache import ResponseCache
+from HttpClient import RETRY_STATUSES
+from Instrumentation import instrumentation
+
+class AsyncTokenBucket:
+    """The asyncio counterpart of HttpClient.TokenBucket."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Takes a token, sleeping until one is available."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AsyncLastFM:
+    """Resolves many last.fm lookups concurrently on one event loop. Use as an async context manager."""
+
+    def __init__(self, key, endpoint = ENDPOINT, cache = None, concurrency = 32, rate = 5, timeout = 20, max_retries = 4, backoff = 0.5):
+        """
+        Initializes the API wrapper. The HTTP session is opened when entering the context.
+
+        Parameters
+        ----------
+        key: str
+            The last.fm API key used for every request.
+        endpoint: str
+            The root URL of the last.fm API.
+        cache: ResponseCache | None
+            Where successful responses are stored and looked up before going to the network.
+        concurrency: int
+            The most requests in flight at once.
+        rate: float
+            The most requests per second sent to last.fm.
+        timeout: float
+            Seconds a single request may take in total.
+        max_retries: int
+            How many times a request is retried after a connection error, 429, 5xx, or temporary last.fm error.
+        backoff: float
+            The delay before the first retry in seconds, doubled on every retry after that.
+        """
+        self.key = key
+        self.endpoint = endpoint
+        self.cache = cache
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retries = 0
+        self.session = None
+        # the asyncio counterparts of LastFM.in_flight and LastFM.failures
+        self.in_flight = {}
+        self.failures = {}
+
+    async def __aenter__(self):
+        self.bucket = AsyncTokenBucket(self.rate, max(int(self.rate), 1))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            connector = aiohttp.TCPConnector(limit = self.concurrency),
+            timeout = aiohttp.ClientTimeout(total = self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exception_info):
+        await self.session.close()
+        self.session = None
+
+    async def request(self, parameters):
+        """Returns the decoded response for the given parameters, sharing identical requests like LastFM.request."""
+        if self.cache is not None:
+            data = self.cache.get(parameters)
+            if data is not None:
+                return data
+
+        key = ResponseCache.make_key(parameters)
+        if key in self.failures:
+            instrumentation.count("api.deduplicated")
+            return self.failures[key]
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.fetch(parameters, key))
+            self.in_flight[key] = task
+        else:
+            instrumentation.count("api.coalesced")
+        # shielded, so a caller that is cancelled does not cancel the request for the others waiting on it
+        return await asyncio.shield(task)
+
+    async def fetch(self, parameters, key):
+        """Sends a request to last.fm, retrying temporary errors, and remembers the answer."""
+        try:
+            data = await self.send(parameters)
+        finally:
+            del self.in_flight[key]
+        if "error" in data:
+            self.failures[key] = data
+        return data
+
+    async def send(self, parameters):
+        """Sends a request to last.fm, retrying connection errors and temporary errors, and caches the answer if it is one."""
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            instrumentation.count("api.requests")
+            await self.bucket.acquire()
+            data = None
+            try:
+                async with self.semaphore:
+                    async with self.session.get(self.endpoint, params = parameters) as response:
+                        if response.status not in RETRY_STATUSES:
+                            # last.fm does not always label its JSON correctly
+                            data = await response.json(content_type = None)
+                        elif attempt >= self.max_retries:
+                            response.raise_for_status()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.max_retries:
+                    raise
+
+            if data is not None and data.get("error") not in TEMPORARY_ERRORS:
+                break
+            if data is not None and attempt >= self.max_retries:
+                raise LastFMError(data["error"], data.get("message", TEMPORARY_ERRORS[data["error"]]))
+
+            self.retries += 1
+            instrumentation.count("api.retries")
+            await asyncio.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+            attempt = attempt + 1
+        # recorded afterwards, spans are not meant to be held across awaits
+        instrumentation.record("api", start, time.perf_counter(), {"method": parameters["method"]})
+
+        # errors such as "track not found" may resolve later, only keep real answers
+        if self.cache is not None and "error" not in data:
+            self.cache.put(parameters, data)
+        return data
+
+    async def get_track_info(self, title, artist):
+        """Returns the decoded track.getInfo response for the given title and artist."""
+        return await self.request({
+            "method": "track.getInfo",
+            "api_key": self.key,
+            "track": title,
+            "artist": artist,
+            "format": "json"
+        })
+
+    async def search_album(self, album_title):
+        """Returns the decoded album.search response for the given album title."""
+        return await self.request({
+            "method": "album.search",
+            "api_key": self.key,
+            "album": album_title,
+            "format": "json"
+        })
+
+    async def get_album_info(self, album_title, artist):
+        """Returns the decoded album.getInfo response for the given album title and artist."""
+        return await self.request({
+            "method": "album.getInfo",
+            "api_key": self.key,
+            "album": album_title,
+            "artist": artist,
+            "format": "json"
+        })
+
+    async def stream(self, lookups):
+        """
+        Runs lookups concurrently and yields (lookup, result) pairs as they finish. A lookup that raised yields its
+        exception as the result, so one failure does not end the others.
+
+        Parameters
+        ----------
+        lookups: Iterable[Tuple[Any, Callable[[], Awaitable[dict]]]]
+            Pairs of an identifying value and a coroutine function performing the lookup. Only
+            `concurrency` lookups are started at a time, so the iterable may be long or lazy.
+        """
+        lookups = iter(lookups)
+        tasks = {}
+
+        def start_next():
+            lookup = next(lookups, None)
+            if lookup is not None:
+                tasks[asyncio.ensure_future(lookup[1]())] = lookup[0]
+
+        for _ in range(self.concurrency):
+            start_next()
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when = asyncio.FIRST_COMPLETED)
+                for task in done:
+                    lookup = tasks.pop(task)
+                    start_next()
+                    error = task.exception()
+                    yield lookup, task.result() if error is None else error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def resolve_tracks(self, queries):
+        """Yields (query, track.getInfo response or exception) pairs for (title, artist) queries as they finish."""
+        return self.stream((query, lambda query = query: self.get_track_info(*query)) for query in queries)
+
+    def search_albums(self, album_titles):
+        """Yields (album title, album.search response or exception) pairs as they finish."""
+        return self.stream((album_title, lambda album_title = album_title: self.search_album(album_title)) for album_title in album_titles)
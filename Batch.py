@@ -0,0 +1,232 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from Prefetcher import prepare_all
+from LastFMProvider import parse_track, parse_album
+import Engine
+import AlbumJob
+from LibraryIndex import REVIEW
+from MetadataWriter import MetadataWriter
+
+def review_reason(job):
+    """Returns why a job cannot be written without a person looking at it, or None if it can."""
+    if job.error is not None:
+        return f"error: {job.error}"
+    if job.title_search is None:
+        return "unparseable filename"
+    if not job.found:
+        return "not found"
+    if job.corrected_from is not None:
+        return f"search corrected from {job.corrected_from[0]} by {job.corrected_from[1]}"
+    if not Engine.is_exact_match(job):
+        return "inexact match"
+    if not job.album_found:
+        return "no album"
+    return None
+
+def finish_job(job, allowed_tags, denied_tags, review_queue, writer, library_index = None):
+    """Queues a resolved job for writing if it is safe to do so, otherwise for review. Returns True if it will be written."""
+    reason = review_reason(job)
+    if reason is not None:
+        queue_for_review(job, reason, review_queue, library_index)
+        return False
+
+    job.tags = Engine.filter_tags(job.tags, allowed_tags, denied_tags)
+    writer.submit(job)
+    return True
+
+def queue_for_review(job, reason, review_queue, library_index = None):
+    """Appends a job to the review queue so the GUI can handle it later."""
+    print(f"review: {job.filename} ({reason})")
+    review_queue.write(json.dumps({
+        "path": os.path.abspath(job.filepath),
+        "reason": reason,
+        "title": job.title_search,
+        "artist": job.artist_search,
+        "suggestions": [[candidate.title, candidate.artist] for candidate in job.suggestions]
+    }) + "\n")
+    review_queue.flush()
+    if library_index is not None:
+        library_index.record(job.filepath, REVIEW)
+
+def report_writes(writer):
+    """Prints the writes finished since the last call."""
+    for result in writer.poll():
+        if result.error is None:
+            print(f"tagged: {result.job.filename}")
+        else:
+            print(f"failed: {os.path.basename(result.previous_path)} ({result.error})")
+
+def run_batch(provider, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index = None, normalizer = None, matcher = None):
+    """
+    Tags every song that the provider matches exactly and that has an album, without any UI.
+
+    Everything else is appended to the review queue, one JSON object per line, so the GUI can handle it later.
+
+    Parameters
+    ----------
+    provider: Provider
+        Where tracks and albums are looked up, such as a LastFMProvider or a ProviderChain.
+    artwork_store: ArtworkStore
+        Where album covers are fetched from.
+    songs: Iterable[str]
+        Paths of the mp3 files to process. May be a lazy iterable, processing starts with the first one.
+    allowed_tags: Set[str]
+        Tags to write whenever the provider reports them.
+    denied_tags: Set[str]
+        Tags to never write.
+    review_queue_path: str
+        The file that songs needing manual review are appended to.
+    library_index: LibraryIndex | None
+        Where the outcome for every song is recorded.
+    normalizer: ArtworkNormalizer | None
+        Shrinks covers before they are embedded.
+    matcher: LocalMatcher | None
+        Corrects misspelled searches against tracks known locally before they are sent.
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of songs written and the number queued for review.
+    """
+    writer = MetadataWriter(library_index, normalizer, workers = 4, max_pending = 16)
+    queued = 0
+    with open(review_queue_path, "a") as review_queue:
+        # existing title and artist are searched like a parsed filename, no one is around to confirm them
+        for job in prepare_all(provider, artwork_store, songs, search_existing = True, matcher = matcher):
+            if not finish_job(job, allowed_tags, denied_tags, review_queue, writer, library_index):
+                queued = queued + 1
+            report_writes(writer)
+
+    writer.close()
+    report_writes(writer)
+    return writer.written, queued
+
+async def run_batch_async(async_lastfm, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index = None, normalizer = None, matcher = None):
+    """
+    Same as run_batch, but resolves every track concurrently on last.fm on an event loop instead of a thread pool.
+
+    Every song is read first so identical searches can be merged. Lookups are streamed back as they
+    finish, and every track found then fetches its cover and album as a task of its own; covers and file
+    writes are handed to threads so they do not block the loop. A file whose read or lookup raises is
+    queued for review like in run_batch.
+    """
+    # only imported here, the other modes do not need it
+    import asyncio
+    writer = MetadataWriter(library_index, normalizer, workers = 4, max_pending = 16)
+    queued = 0
+    # finish_job writes to the review queue, one job at a time
+    finishing = asyncio.Lock()
+
+    async def finish(job):
+        nonlocal queued
+        async with finishing:
+            if not await asyncio.to_thread(finish_job, job, allowed_tags, denied_tags, review_queue, writer, library_index):
+                queued = queued + 1
+            report_writes(writer)
+
+    async def complete(job, data):
+        """Fills in a job from its track.getInfo response, fetching its cover and album, and finishes it."""
+        try:
+            track = parse_track(data)
+            # only a search that found nothing is corrected, like Engine.prepare does
+            if track is None and matcher is not None and Engine.correct_search(matcher, job):
+                track = parse_track(await async_lastfm.get_track_info(job.title_search, job.artist_search))
+                if track is None:
+                    Engine.undo_correction(job)
+            await asyncio.to_thread(Engine.apply_track_info, artwork_store, job, track)
+            # cached after the first track, so this is one request per album
+            if job.found and job.album_found:
+                Engine.apply_album_info(job, parse_album(await async_lastfm.get_album_info(job.album_title, job.album_artist)))
+        except Exception as error:
+            job.error = Engine.describe_error(error)
+        if matcher is not None and job.error is None:
+            Engine.learn(matcher, job)
+        await finish(job)
+
+    with open(review_queue_path, "a") as review_queue:
+        jobs = {}
+        for filepath in await asyncio.to_thread(list, songs):
+            try:
+                job = await asyncio.to_thread(Engine.prepare_offline, filepath)
+            except Exception as error:
+                job = Engine.failed_job(filepath, error)
+            if job.error is not None or job.title_search is None:
+                await finish(job)
+                continue
+            jobs.setdefault((job.title_search, job.artist_search), []).append(job)
+
+        # identical searches are only sent once
+        tasks = []
+        async with async_lastfm:
+            async for query, data in async_lastfm.resolve_tracks(list(jobs)):
+                for job in jobs[query]:
+                    if isinstance(data, Exception):
+                        job.error = Engine.describe_error(data)
+                        tasks.append(asyncio.ensure_future(finish(job)))
+                    else:
+                        tasks.append(asyncio.ensure_future(complete(job, data)))
+            await asyncio.gather(*tasks)
+
+    await asyncio.to_thread(writer.close)
+    report_writes(writer)
+    return writer.written, queued
+
+def run_album_batch(provider, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index = None, normalizer = None, workers = 4):
+    """
+    Same as run_batch, but treats every folder as one album: a single album lookup and cover download
+    tags every file found on the album's tracklist.
+
+    Albums are taken from the files' album tags, an `Artist - Album` folder name, or a lookup of one of the
+    tracks, in that order. Files in albums that cannot be found, not on the tracklist, or only close to a title on
+    it go to the review queue, as do all files of an album whose lookup or cover download raised.
+    """
+    def resolve(album):
+        try:
+            return AlbumJob.resolve_album(provider, artwork_store, album)
+        except Exception as error:
+            album.error = Engine.describe_error(error)
+            return False
+
+    writer = MetadataWriter(library_index, normalizer, workers = 4, max_pending = 16)
+    queued = 0
+    with open(review_queue_path, "a") as review_queue, ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "album") as executor:
+        albums = AlbumJob.group_albums(songs)
+        for album, found in zip(albums, executor.map(resolve, albums)):
+            if album.error is not None:
+                print(f"album lookup failed: {os.path.basename(album.directory)} ({album.error})")
+            elif found:
+                print(f"album: {album.album_title} by {album.album_artist}, {len(album.matched)} of {len(album.tracks)} files matched")
+            for job in album.tracks:
+                if job.found:
+                    job.tags = Engine.filter_tags(job.tags, allowed_tags, denied_tags)
+                    writer.submit(job)
+                else:
+                    if job.error is not None:
+                        reason = f"error: {job.error}"
+                    elif album.error is not None:
+                        reason = f"album lookup failed: {album.error}"
+                    elif job.suggestions:
+                        # match_tracks suggests the tracklist entry a file's title is close to
+                        reason = "close title match"
+                    else:
+                        reason = "not on album" if found else "album not found"
+                    queue_for_review(job, reason, review_queue, library_index)
+                    queued = queued + 1
+                report_writes(writer)
+
+    writer.close()
+    report_writes(writer)
+    return writer.written, queued
+
+def read_review_queue(review_queue_path):
+    """Returns the paths listed in a review queue that still exist, in order and without duplicates."""
+    paths = []
+    with open(review_queue_path) as review_queue:
+        for line in review_queue:
+            if line.strip() == "":
+                continue
+            path = json.loads(line)["path"]
+            if path not in paths and os.path.isfile(path):
+                paths.append(path)
+    return paths
@@ -0,0 +1,359 @@
+import os
+import re
+import shutil
+import threading
+import uuid
+from io import BytesIO
+import music_tag
+from mutagen.id3 import TXXX, UFID
+from ID3Reader import ID3Reader
+from Instrumentation import instrumentation
+
+# in-progress writes use this prefix, the scanner ignores files starting with it
+TEMPORARY_PREFIX = ".tracktagger-"
+
+# paths that writes in progress are moving files to, so two writer threads never pick the same name
+reserved_paths = set()
+reserved_lock = threading.Lock()
+
+# last.fm reports MusicBrainz recording IDs for tracks, stored the way MusicBrainz Picard does
+MUSICBRAINZ_OWNER = "http://musicbrainz.org"
+MBID_DESCRIPTIONS = {
+    "artist": "MusicBrainz Artist Id",
+    "album": "MusicBrainz Album Id"
+}
+
+class TrackJob:
+    """Holds everything known about a single track while it is being tagged, independent of any UI."""
+
+    def __init__(self, filepath):
+        """
+        Initializes an empty job.
+
+        Parameters
+        ----------
+        filepath: str
+            The path of the mp3 file being tagged.
+        """
+        self.filepath = filepath
+        self.filename = os.path.basename(filepath)
+
+        # criteria the track is looked up with, None if there is nothing to search with
+        self.title_search = None
+        self.artist_search = None
+        # True if title and artist came from the file's existing metadata
+        self.existing = False
+        # True if the provider returned a track for the search criteria
+        self.found = False
+        # the search as it was before the local matcher corrected it, None if it was not corrected
+        self.corrected_from = None
+        # tracks known locally that look like the search, offered when the lookup finds nothing
+        self.suggestions = []
+
+        self.title = ""
+        self.artist = ""
+        self.playcount = -1
+        self.tags = []
+        self.album_title = None
+        self.album_artist = None
+        self.cover = None
+        # filled in when the provider reports them, None otherwise
+        self.track_number = None
+        self.total_tracks = None
+        self.year = None
+        # MusicBrainz IDs keyed by "track", "artist", and "album"
+        self.mbids = {}
+        # the file's tags as read_existing found them, kept so they are not read again
+        self.file_tags = None
+        # why the file could not be read or looked up, None if nothing went wrong
+        self.error = None
+
+    @property
+    def album_found(self):
+        return self.album_title is not None
+
+    def set_album(self, album_title, album_artist, cover):
+        """Sets the album, forgetting anything that was only known for the previous one."""
+        self.album_title = album_title
+        self.album_artist = album_artist
+        self.cover = cover
+        self.track_number = None
+        self.total_tracks = None
+        self.year = None
+        self.mbids.pop("album", None)
+
+def normalize(text):
+    """Collapses whitespace and case so that names can be compared."""
+    return " ".join(text.split()).casefold()
+
+def read_existing(job):
+    """Fills in title and artist from the file's metadata. Returns True if both were present."""
+    # only the text frames are read, the artwork and audio are skipped over
+    with instrumentation.span("read", file = job.filename):
+        job.file_tags = ID3Reader(job.filepath)
+    title = job.file_tags["title"]
+    artist = job.file_tags["artist"]
+    if title == "" or artist == "":
+        return False
+
+    job.existing = True
+    job.title = title
+    job.artist = artist
+    job.title_search = title
+    job.artist_search = artist
+    return True
+
+def parse_filename(job):
+    """Fills in search criteria from a `Title - Artist.mp3` filename. Returns False if the name is not in that format."""
+    if " - " not in job.filename:
+        return False
+
+    job.title_search = job.filename.split(" - ")[0]
+    job.artist_search = os.path.splitext(job.filename.split(" - ")[1])[0]
+    return True
+
+def set_mbid(job, key, mbid):
+    """Stores a MusicBrainz ID unless the provider left it blank."""
+    if mbid:
+        job.mbids[key] = mbid
+
+def resolve(provider, artwork_store, job, title_search, artist_search):
+    """
+    Looks the track up and fills the job with its info, tags, album, and cover. Returns True if found.
+
+    The album is looked up too, for the track count and release year. Providers cache albums, so that
+    costs one lookup per album rather than per track.
+    """
+    job.title_search = title_search
+    job.artist_search = artist_search
+    found = apply_track_info(artwork_store, job, provider.track(title_search, artist_search))
+    if found and job.album_found:
+        apply_album_info(job, provider.album(job.album_title, job.album_artist))
+    return found
+
+def apply_track_info(artwork_store, job, track):
+    """Fills the job from a Provider.Track, fetching the album cover. Returns True if there was a track, False for None."""
+    if track is None:
+        job.found = False
+        # nothing known about an earlier track may end up in the file
+        job.playcount = -1
+        job.mbids = {}
+        return False
+
+    job.found = True
+    job.existing = False
+    job.title = track.title
+    job.artist = track.artist
+    job.playcount = track.playcount
+    job.tags = [tag.lower() for tag in track.tags]
+
+    job.mbids = {}
+    set_mbid(job, "track", track.mbid)
+    set_mbid(job, "artist", track.artist_mbid)
+
+    if track.album is not None:
+        job.set_album(track.album.title, track.album.artist, artwork_store.get(track.album.cover_url))
+        job.track_number = track.number
+        set_mbid(job, "album", track.album.mbid)
+    else:
+        job.set_album(None, None, None)
+    return True
+
+def apply_album_info(job, album):
+    """Fills in the track count, release year, album ID, and (if still missing) track number from a Provider.Album, if there is one."""
+    if album is None:
+        return
+
+    job.total_tracks = len(album.tracks) or None
+    job.year = album.year
+    set_mbid(job, "album", album.mbid)
+    if job.track_number is None:
+        for entry in album.tracks:
+            if normalize(entry.title) == normalize(job.title):
+                job.track_number = entry.number
+                break
+
+def correct_search(matcher, job):
+    """Replaces the search criteria with a track known locally if they look like a misspelling of it. Returns True if they were replaced."""
+    candidate = matcher.correct(job.title_search, job.artist_search)
+    if candidate is None:
+        return False
+
+    job.corrected_from = (job.title_search, job.artist_search)
+    job.title_search = candidate.title
+    job.artist_search = candidate.artist
+    return True
+
+def undo_correction(job):
+    """Puts back the search criteria correct_search replaced."""
+    job.title_search, job.artist_search = job.corrected_from
+    job.corrected_from = None
+
+def learn(matcher, job):
+    """Adds a found track to the matcher, or offers the closest local tracks as suggestions if nothing was found."""
+    if job.found:
+        job.suggestions = []
+        matcher.add(job.title, job.artist, job.album_title)
+    else:
+        job.suggestions = matcher.match(job.title_search, job.artist_search)
+
+def prepare(provider, artwork_store, filepath, search_existing = False, matcher = None):
+    """
+    Builds a job for the file, looking it up with the provider whenever there is something to search with.
+
+    Existing metadata is only searched if search_existing is True, otherwise it is left for the user to verify.
+    With a LocalMatcher, a search that finds nothing is retried once with the local track it most likely
+    misspells; corrected_from is set if that one was found.
+    """
+    job = prepare_offline(filepath)
+    if job.title_search is not None and (search_existing or not job.existing):
+        resolve(provider, artwork_store, job, job.title_search, job.artist_search)
+        if not job.found and matcher is not None and correct_search(matcher, job):
+            resolve(provider, artwork_store, job, job.title_search, job.artist_search)
+            if not job.found:
+                undo_correction(job)
+        if matcher is not None:
+            learn(matcher, job)
+    return job
+
+def prepare_offline(filepath):
+    """Builds a job for the file from its metadata or filename only, without going to the network."""
+    job = TrackJob(filepath)
+    if not read_existing(job):
+        parse_filename(job)
+    return job
+
+def failed_job(filepath, error):
+    """Returns an empty job for a file whose preparation raised, so it can be queued for review instead of ending a batch."""
+    job = TrackJob(filepath)
+    job.error = describe_error(error)
+    return job
+
+def describe_error(error):
+    """Returns an exception as one line of text for the review queue."""
+    # some libraries raise errors without a message, their repr at least names them
+    return f"{type(error).__name__}: {error}" if str(error) else repr(error)
+
+def is_exact_match(job):
+    """Returns True if the provider found the track under exactly the searched title and artist."""
+    return job.found and normalize(job.title) == normalize(job.title_search) and normalize(job.artist) == normalize(job.artist_search)
+
+def filter_tags(tags, allowed, denied):
+    """Returns the tags that would be pre-selected on TagSelection: allowed and not denied."""
+    return [tag for tag in tags if tag in allowed and tag not in denied]
+
+def clean_filename_part(text):
+    """Removes characters that are illegal in file paths."""
+    return re.sub('[\\\\/:*?"<>|]', '', text)
+
+def write(job):
+    """
+    Writes the job's metadata into its file and renames it to `Title - Artist.mp3`. Returns the new path.
+
+    The tags are written to a copy next to the file, flushed to disk, and then moved into place, so an
+    interrupted write never leaves a half-written mp3 behind. If another file already has the name, the
+    file is named `Title - Artist (2).mp3` and so on instead of replacing it.
+    """
+    with instrumentation.span("write", file = job.filename):
+        directory = os.path.dirname(job.filepath)
+        # remove illegal filepath characters from the title and artist before renaming
+        new_path = reserve_path(directory, f"{clean_filename_part(job.title)} - {clean_filename_part(job.artist)}", job.filepath)
+        try:
+            write_to(job, directory, new_path)
+        finally:
+            with reserved_lock:
+                reserved_paths.discard(new_path)
+
+        job.filepath = new_path
+        job.filename = os.path.basename(new_path)
+        return new_path
+
+def reserve_path(directory, name, filepath):
+    """Returns the path in directory a file named name (plus a number if taken) can be moved to, and reserves it until released."""
+    with reserved_lock:
+        number = 1
+        while True:
+            path = os.path.join(directory, f"{name}.mp3" if number == 1 else f"{name} ({number}).mp3")
+            # the file may already have the name, then it is simply replaced by its tagged copy
+            taken = path in reserved_paths or (os.path.exists(path) and not os.path.samefile(filepath, path))
+            if not taken:
+                reserved_paths.add(path)
+                return path
+            number = number + 1
+
+def write_to(job, directory, new_path):
+    """Writes the job's metadata into a copy of its file, moves the copy to new_path, and removes the original."""
+    # music_tag picks the format from the extension, so the copy keeps it
+    temporary_path = os.path.join(directory, f"{TEMPORARY_PREFIX}{uuid.uuid4().hex}.mp3")
+
+    shutil.copyfile(job.filepath, temporary_path)
+    try:
+        # the tagged copy replaces the file, so it keeps its permissions
+        shutil.copymode(job.filepath, temporary_path)
+        file = music_tag.load_file(temporary_path)
+        file["title"] = job.title
+        file["artist"] = job.artist
+        file["album"] = job.album_title
+        file["albumartist"] = job.album_artist
+        if job.cover is not None:
+            file["artwork"] = BytesIO(job.cover).read()
+        file["genre"] = job.tags
+        # numbers the provider did not report are left as they were
+        if job.track_number is not None:
+            file["tracknumber"] = job.track_number
+        if job.total_tracks is not None:
+            file["totaltracks"] = job.total_tracks
+        if job.year is not None:
+            file["year"] = job.year
+        write_mbids(file, job.mbids)
+        file.save()
+
+        with open(temporary_path, "rb+") as temporary_file:
+            os.fsync(temporary_file.fileno())
+        os.replace(temporary_path, new_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+    # on case-insensitive file systems the old name may already point at the new file
+    if new_path != job.filepath and not os.path.samefile(job.filepath, new_path):
+        os.remove(job.filepath)
+    sync_directory(directory)
+
+def write_mbids(file, mbids):
+    """Adds MusicBrainz IDs to a music_tag file's ID3 tags, which music_tag has no fields for."""
+    if file.mfile.tags is None:
+        file.mfile.add_tags()
+    tags = file.mfile.tags
+    if "track" in mbids:
+        tags.setall(f"UFID:{MUSICBRAINZ_OWNER}", [UFID(owner = MUSICBRAINZ_OWNER, data = mbids["track"].encode())])
+    for key, description in MBID_DESCRIPTIONS.items():
+        if key in mbids:
+            tags.setall(f"TXXX:{description}", [TXXX(encoding = 3, desc = description, text = [mbids[key]])])
+
+def sync_directory(directory):
+    """Flushes a directory's entries to disk so renames survive a crash. Not supported on every platform."""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+def metadata(job):
+    """Returns the metadata write() puts into the file, as a plain dict."""
+    return {
+        "title": job.title,
+        "artist": job.artist,
+        "album": job.album_title,
+        "albumartist": job.album_artist,
+        "genre": job.tags,
+        "tracknumber": job.track_number,
+        "totaltracks": job.total_tracks,
+        "year": job.year,
+        "mbids": job.mbids
+    }
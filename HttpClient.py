@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from Instrumentation import instrumentation
+
+# statuses worth retrying, everything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Limits how often an action may happen, allowing short bursts."""
+
+    def __init__(self, rate, capacity):
+        """
+        Initializes a full bucket.
+
+        Parameters
+        ----------
+        rate: float
+            Tokens added per second.
+        capacity: int
+            The most tokens the bucket holds, i.e. the largest burst allowed.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class HttpClient:
+    """A shared HTTP client with pooled keep-alive connections, bounded concurrency, rate limiting, and retries."""
+
+    def __init__(self, timeout = (5, 20), max_connections = 8, max_retries = 4, backoff = 0.5):
+        """
+        Initializes the connection pool.
+
+        Parameters
+        ----------
+        timeout: float | Tuple[float, float]
+            Seconds to wait for a connection and for a response, passed to requests.
+        max_connections: int
+            The most requests in flight at once, and the number of connections kept alive per host.
+        max_retries: int
+            How many times a request is retried after a connection error, 429, or 5xx response.
+        backoff: float
+            The delay before the first retry in seconds, doubled on every retry after that.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.semaphore = threading.BoundedSemaphore(max_connections)
+        self.rate_limits = {}
+        self.retries = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = 4, pool_maxsize = max_connections)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def set_rate_limit(self, url, rate, burst = 1):
+        """Limits requests to the host of the given URL to rate per second."""
+        self.rate_limits[urlparse(url).hostname] = TokenBucket(rate, burst)
+
+    def backoff_delay(self, attempt, retry_after = None):
+        """Returns how long to wait before retry number attempt, honoring a Retry-After header if given."""
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # jitter keeps parallel workers from retrying in lockstep
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def get(self, url, params = None):
+        """
+        Sends a GET request, retrying connection errors, 429s, and 5xx responses with exponential backoff.
+
+        Raises requests.RequestException once the retries are used up.
+        """
+        bucket = self.rate_limits.get(urlparse(url).hostname)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                bucket.acquire()
+
+            try:
+                with self.semaphore:
+                    response = self.session.get(url, params = params, timeout = self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if attempt >= self.max_retries:
+                    response.raise_for_status()
+                delay = self.backoff_delay(attempt, response.headers.get("Retry-After"))
+
+            self.retries += 1
+            instrumentation.count("api.retries")
+            attempt = attempt + 1
+            time.sleep(delay)
+
+    def close(self):
+        self.session.close()
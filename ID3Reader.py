@@ -0,0 +1,152 @@
+import os
+import re
+from Instrumentation import instrumentation
+
+# the text frames read, by the name they are looked up with; ID3v2.2 uses three letter IDs
+FRAMES = {
+    "TIT2": "title", "TPE1": "artist", "TALB": "album", "TPE2": "albumartist",
+    "TT2": "title", "TP1": "artist", "TAL": "album", "TP2": "albumartist"
+}
+# frames holding embedded artwork, only noted, never read
+PICTURE_FRAMES = {b"APIC", b"PIC"}
+# text frames larger than this are left to music_tag rather than read into memory
+MAX_TEXT_SIZE = 64 * 1024
+ENCODINGS = ["latin-1", "utf-16", "utf-16-be", "utf-8"]
+
+class UnsupportedTag(Exception):
+    """Raised for tags using ID3 features the reader does not handle, such as unsynchronisation or compression."""
+
+class ID3Reader:
+    """
+    Reads the title, artist, album, and album artist of an mp3 from its ID3 tag without loading the rest of it.
+
+    Only the tag header and frame headers are read, and the body of a frame only if it is one of the text frames
+    above. Everything else, embedded artwork included, is skipped by seeking past it, so a file costs a few small
+    reads however large its cover is. Tags the reader cannot parse are read with music_tag instead, which gives
+    the same result at the cost of a full load.
+    """
+
+    def __init__(self, path):
+        """
+        Reads the tag of a file.
+
+        Parameters
+        ----------
+        path: str
+            The mp3 file to read.
+        """
+        self.path = path
+        self.fields = {}
+        # True if the tag has embedded artwork
+        self.cover = False
+        with open(path, "rb") as file:
+            try:
+                self.read(file)
+            except UnsupportedTag:
+                self.read_fallback()
+
+    def __getitem__(self, name):
+        """Returns a field as a string, empty if the tag does not have it, like str(music_tag_file[name])."""
+        return self.fields.get(name, "")
+
+    def read(self, file):
+        """Reads the ID3v2 tag at the start of the file, or the ID3v1 tag at the end if there is none."""
+        header = file.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            self.read_version_1(file)
+            return
+
+        version, flags = header[3], header[5]
+        if version not in (2, 3, 4):
+            raise UnsupportedTag(f"ID3v2.{version}")
+        # whole-tag unsynchronisation, or compression in ID3v2.2, changes every byte after the header
+        if flags & 0x80 or (version == 2 and flags & 0x40):
+            raise UnsupportedTag("unsynchronised or compressed tag")
+        # frames end where the tag does, a v2.4 footer after them is never read
+        end = 10 + syncsafe(header[6:10])
+
+        if version > 2 and flags & 0x40:
+            # the extended header holds nothing needed here, its size counts itself in v2.4 but not in v2.3
+            extended = file.read(4)
+            file.seek(syncsafe(extended) - 4 if version == 4 else int.from_bytes(extended, "big"), os.SEEK_CUR)
+
+        header_size = 6 if version == 2 else 10
+        while file.tell() + header_size <= end and not (len(self.fields) == 4 and self.cover):
+            frame_header = file.read(header_size)
+            if len(frame_header) < header_size:
+                break
+            if version == 2:
+                frame_id, size, frame_flags = frame_header[:3], int.from_bytes(frame_header[3:6], "big"), 0
+            else:
+                frame_id, frame_flags = frame_header[:4], frame_header[9]
+                size = syncsafe(frame_header[4:8]) if version == 4 else int.from_bytes(frame_header[4:8], "big")
+            # padding, or garbage where frames should be
+            if not re.fullmatch(b"[A-Z0-9]+", frame_id):
+                break
+            if file.tell() + size > end:
+                raise UnsupportedTag("frame past the end of the tag")
+
+            self.cover = self.cover or frame_id in PICTURE_FRAMES
+            name = FRAMES.get(frame_id.decode())
+            if name is None or name in self.fields:
+                file.seek(size, os.SEEK_CUR)
+                continue
+            self.fields[name] = self.read_text(file, size, version, frame_flags)
+
+    def read_text(self, file, size, version, frame_flags):
+        """Reads the body of a text frame and returns its values joined by commas."""
+        if size > MAX_TEXT_SIZE:
+            raise UnsupportedTag("text frame too large")
+        skip = 0
+        if version == 3:
+            if frame_flags & 0xc0:
+                raise UnsupportedTag("compressed or encrypted frame")
+            # a group ID byte comes before the body
+            skip = 1 if frame_flags & 0x20 else 0
+        elif version == 4:
+            if frame_flags & 0x0e:
+                raise UnsupportedTag("compressed, encrypted, or unsynchronised frame")
+            skip = (1 if frame_flags & 0x40 else 0) + (4 if frame_flags & 0x01 else 0)
+
+        body = file.read(size)[skip:]
+        if not body or body[0] >= len(ENCODINGS):
+            raise UnsupportedTag("unknown text encoding")
+        try:
+            text = body[1:].decode(ENCODINGS[body[0]])
+        except UnicodeDecodeError:
+            raise UnsupportedTag("undecodable text frame")
+        # values are separated by nulls and the last one may be terminated by one too, in UTF-16 each has a BOM
+        values = [value.lstrip("\ufeff") for value in text.split("\x00")]
+        while values and values[-1] == "":
+            values.pop()
+        return ", ".join(values)
+
+    def read_version_1(self, file):
+        """Reads the fixed-size ID3v1 tag in the last 128 bytes of the file, if there is one."""
+        if file.seek(0, os.SEEK_END) < 128:
+            return
+        file.seek(-128, os.SEEK_END)
+        data = file.read(128)
+        if data[:3] != b"TAG":
+            return
+        for name, start in (("title", 3), ("artist", 33), ("album", 63)):
+            value = data[start:start + 30].split(b"\x00")[0].strip().decode("latin-1")
+            if value != "":
+                self.fields[name] = value
+
+    def read_fallback(self):
+        """Reads the fields with music_tag, which parses the whole tag."""
+        import music_tag
+        instrumentation.count("tags.fallbacks")
+        file = music_tag.load_file(self.path)
+        self.fields = {}
+        for name in set(FRAMES.values()):
+            value = str(file[name])
+            if value != "":
+                self.fields[name] = value
+        tags = file.mfile.tags
+        self.cover = tags is not None and bool(tags.getall("APIC") or tags.getall("PIC"))
+
+def syncsafe(data):
+    """Decodes a four byte ID3v2 size that uses seven bits per byte."""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# trace events kept before further ones are dropped, about 200 bytes each
+MAX_EVENTS = 1000000
+
+class Histogram:
+    """Counts durations in power-of-two buckets of microseconds, so memory stays the same however many are added."""
+
+    def __init__(self):
+        # bucket i holds durations from 2^i up to 2^(i + 1) microseconds
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, seconds):
+        microseconds = max(1, int(seconds * 1000000))
+        bucket = microseconds.bit_length() - 1
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    def percentile(self, fraction):
+        """Returns an upper bound in seconds on the given fraction of durations, accurate to a factor of two."""
+        if self.count == 0:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** (bucket + 1) / 1000000, self.maximum)
+        return self.maximum
+
+    def summary(self):
+        milliseconds = lambda seconds: None if seconds is None else round(seconds * 1000, 3)
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_ms": milliseconds(self.total / self.count) if self.count else None,
+            "min_ms": milliseconds(self.minimum),
+            "p50_ms": milliseconds(self.percentile(0.5)),
+            "p90_ms": milliseconds(self.percentile(0.9)),
+            "p99_ms": milliseconds(self.percentile(0.99)),
+            "max_ms": milliseconds(self.maximum)
+        }
+
+class Instrumentation:
+    """
+    Collects timings and counters for the stages a track passes through: scan, read, api, download, decode,
+    normalize, write, and index. Safe to use from any thread.
+
+    Every span adds to its stage's histogram. After start_trace() every span is also kept as an event, so
+    export() can write a file that chrome://tracing or Perfetto shows as a timeline per thread.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        # None unless tracing, trace events are only kept when asked for
+        self.events = None
+        self.dropped = 0
+        self.origin = time.perf_counter()
+
+    def start_trace(self):
+        """Starts keeping an event for every span."""
+        with self.lock:
+            self.events = []
+
+    @contextmanager
+    def span(self, stage, **details):
+        """Times the enclosed block as one occurrence of stage. Details are shown with the event in a trace."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.perf_counter(), details)
+
+    def record(self, stage, start, end, details = None):
+        """Adds a span measured elsewhere, with perf_counter() start and end times."""
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.add(end - start)
+
+            if self.events is None:
+                return
+            if len(self.events) >= MAX_EVENTS:
+                self.dropped += 1
+                return
+            self.events.append({
+                "name": stage,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1000000, 1),
+                "dur": round((end - start) * 1000000, 1),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": details or {}
+            })
+
+    def count(self, name, amount = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Returns every stage's histogram summary and every counter."""
+        with self.lock:
+            return {
+                "stages": {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+                "counters": dict(self.counters)
+            }
+
+    def report(self):
+        """Returns a table of the stages, slowest in total first, followed by the counters."""
+        summary = self.summary()
+        lines = [f"{'stage':<14} {'count':>8} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for stage, stats in sorted(summary["stages"].items(), key = lambda item: item[1]["total_s"], reverse = True):
+            lines.append(
+                f"{stage:<14} {stats['count']:>8} {stats['total_s']:>9.3f} {stats['mean_ms']:>9.2f} "
+                f"{stats['p50_ms']:>9.2f} {stats['p90_ms']:>9.2f} {stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}"
+            )
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def export(self, path):
+        """Writes the trace events, if any, and the summary as a Chrome trace JSON file."""
+        with self.lock:
+            events = list(self.events or [])
+            dropped = self.dropped
+        with open(path, "w") as file:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": dict(self.summary(), dropped_events = dropped)
+            }, file)
+
+# the instance every module reports to
+instrumentation = Instrumentation()
@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import Future
+from ResponseCache import ResponseCache
+from Instrumentation import instrumentation
+
+ENDPOINT = "https://ws.audioscrobbler.com/2.0/"
+
+# last.fm reports these in the response body, they are worth retrying
+TEMPORARY_ERRORS = {
+    11: "service offline",
+    16: "temporary error",
+    29: "rate limit exceeded"
+}
+
+class LastFMError(Exception):
+    """Raised when last.fm keeps reporting a temporary error after every retry."""
+
+    def __init__(self, code, message):
+        super().__init__(f"last.fm error {code}: {message}")
+        self.code = code
+
+class LastFM:
+    """Wraps the last.fm API calls used to look up tracks and albums."""
+
+    def __init__(self, key, client, endpoint = ENDPOINT, cache = None, rate = 5):
+        """
+        Initializes the API wrapper.
+
+        Parameters
+        ----------
+        key: str
+            The last.fm API key used for every request.
+        client: HttpClient
+            The shared client requests are sent through.
+        endpoint: str
+            The root URL of the last.fm API.
+        cache: ResponseCache | None
+            Where successful responses are stored and looked up before going to the network.
+        rate: float
+            The most requests per second sent to last.fm.
+        """
+        self.key = key
+        self.client = client
+        self.endpoint = endpoint
+        self.cache = cache
+        self.client.set_rate_limit(endpoint, rate, burst = max(int(rate), 1))
+
+        self.lock = threading.Lock()
+        # request key -> Future, so concurrent identical requests share a single round trip
+        self.in_flight = {}
+        # request key -> answers such as "track not found", which are not cached but do not change within a session
+        self.failures = {}
+
+    def request(self, parameters):
+        """
+        Returns the decoded response for the given parameters, using the cache when possible.
+
+        Each distinct request (ignoring letter case and spacing, see ResponseCache.make_key) goes to the network at
+        most once per session: threads asking for one that is already in flight wait for its answer, and a
+        repeated request is answered from the cache (if there is one), or from this session's failures if
+        last.fm did not find what it asked for.
+        """
+        if self.cache is not None:
+            data = self.cache.get(parameters)
+            if data is not None:
+                return data
+
+        key = ResponseCache.make_key(parameters)
+        with self.lock:
+            data = self.failures.get(key)
+            future = self.in_flight.get(key)
+            owner = data is None and future is None
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+        if data is not None:
+            instrumentation.count("api.deduplicated")
+            return data
+        if not owner:
+            instrumentation.count("api.coalesced")
+            return future.result()
+
+        try:
+            data = self.fetch(parameters)
+            future.set_result(data)
+        except BaseException as exception:
+            future.set_exception(exception)
+            raise
+        finally:
+            with self.lock:
+                if data is not None and "error" in data:
+                    self.failures[key] = data
+                del self.in_flight[key]
+        return data
+
+    def fetch(self, parameters):
+        """Sends a request to last.fm, retrying temporary errors, and caches the answer if it is one."""
+        attempt = 0
+        with instrumentation.span("api", method = parameters["method"]):
+            while True:
+                instrumentation.count("api.requests")
+                data = self.client.get(self.endpoint, params = parameters).json()
+                if data.get("error") not in TEMPORARY_ERRORS:
+                    break
+                if attempt >= self.client.max_retries:
+                    raise LastFMError(data["error"], data.get("message", TEMPORARY_ERRORS[data["error"]]))
+                time.sleep(self.client.backoff_delay(attempt))
+                attempt = attempt + 1
+
+        # errors such as "track not found" may resolve later, only keep real answers
+        if self.cache is not None and "error" not in data:
+            self.cache.put(parameters, data)
+        return data
+
+    def get_track_info(self, title, artist):
+        """Returns the decoded track.getInfo response for the given title and artist."""
+        parameters = {
+            "method": "track.getInfo",
+            "api_key": self.key,
+            "track": title,
+            "artist": artist,
+            "format": "json"
+        }
+        return self.request(parameters)
+
+    def search_album(self, album_title):
+        """Returns the decoded album.search response for the given album title."""
+        parameters = {
+            "method": "album.search",
+            "api_key": self.key,
+            "album": album_title,
+            "format": "json"
+        }
+        return self.request(parameters)
+
+    def get_album_info(self, album_title, artist):
+        """Returns the decoded album.getInfo response, including the tracklist, for the given album title and artist."""
+        parameters = {
+            "method": "album.getInfo",
+            "api_key": self.key,
+            "album": album_title,
+            "artist": artist,
+            "format": "json"
+        }
+        return self.request(parameters)
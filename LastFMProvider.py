@@ -0,0 +1,118 @@
+import re
+import requests
+from LastFM import LastFMError
+from Provider import Provider, ProviderError, Track, Album
+
+def as_list(container, key):
+    """Returns the items of a last.fm list, which is an empty string when empty and a lone dict when it has one item."""
+    if not isinstance(container, dict) or key not in container:
+        return []
+    items = container[key]
+    return items if isinstance(items, list) else [items]
+
+def parse_number(text):
+    """Returns text as an int, or None if it is missing or not a number."""
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+def release_year(info):
+    """Returns the release year in an album.getInfo album, None if last.fm did not include one."""
+    # only older albums carry a release date, the wiki's publication date says nothing about the album
+    match = re.search(r"\b(\d{4})\b", info.get("releasedate") or "")
+    return int(match.group(1)) if match else None
+
+def cover_url(info):
+    """Returns the address of the largest image of a last.fm album, None if there is none."""
+    images = info.get("image") or []
+    return (images[-1]["#text"] or None) if images else None
+
+def parse_track(data):
+    """Returns the Track in a track.getInfo response, None if last.fm did not find one."""
+    if "track" not in data:
+        return None
+    track = data["track"]
+    album = None
+    number = None
+    if "album" in track:
+        info = track["album"]
+        album = Album(info["title"], info["artist"], cover_url(info), mbid = info.get("mbid") or None)
+        number = parse_number(info.get("@attr", {}).get("position"))
+    playcount = parse_number(track.get("playcount"))
+    return Track(
+        track["name"],
+        track["artist"]["name"],
+        playcount = -1 if playcount is None else playcount,
+        tags = tuple(tag["name"] for tag in as_list(track.get("toptags"), "tag")),
+        number = number,
+        mbid = track.get("mbid") or None,
+        artist_mbid = track["artist"].get("mbid") or None,
+        album = album
+    )
+
+def parse_album(data):
+    """Returns the Album in an album.getInfo response, with its tracklist, None if last.fm did not find one."""
+    if "album" not in data:
+        return None
+    info = data["album"]
+    tracks = tuple(
+        Track(
+            entry["name"],
+            entry["artist"]["name"],
+            number = parse_number(entry.get("@attr", {}).get("rank")),
+            mbid = entry.get("mbid") or None,
+            artist_mbid = entry["artist"].get("mbid") or None
+        )
+        for entry in as_list(info.get("tracks"), "track")
+    )
+    return Album(
+        info["name"],
+        info["artist"],
+        cover_url(info),
+        tags = tuple(tag["name"] for tag in as_list(info.get("tags"), "tag")),
+        year = release_year(info),
+        mbid = info.get("mbid") or None,
+        tracks = tracks
+    )
+
+def parse_album_matches(data):
+    """Returns the Albums in an album.search response, empty if last.fm found none."""
+    if "results" not in data:
+        return []
+    return [
+        Album(match["name"], match["artist"], cover_url(match), mbid = match.get("mbid") or None)
+        for match in as_list(data["results"].get("albummatches"), "album")
+    ]
+
+class LastFMProvider(Provider):
+    """Looks tracks and albums up on last.fm, turning its responses into Tracks and Albums."""
+
+    name = "lastfm"
+
+    def __init__(self, lastfm):
+        """
+        Initializes the provider.
+
+        Parameters
+        ----------
+        lastfm: LastFM
+            The API wrapper requests are sent through, with its cache and rate limit.
+        """
+        self.lastfm = lastfm
+
+    def call(self, method, *arguments):
+        """Calls a LastFM method, reporting network errors and exhausted retries as ProviderError."""
+        try:
+            return method(*arguments)
+        except (requests.RequestException, LastFMError) as error:
+            raise ProviderError(f"last.fm could not be reached: {error}") from error
+
+    def find_track(self, title, artist):
+        return parse_track(self.call(self.lastfm.get_track_info, title, artist))
+
+    def find_album(self, album_title, artist):
+        return parse_album(self.call(self.lastfm.get_album_info, album_title, artist))
+
+    def find_albums(self, album_title):
+        return parse_album_matches(self.call(self.lastfm.search_album, album_title))
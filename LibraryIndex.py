@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from Instrumentation import instrumentation
+
+# bytes hashed from each end of a file, enough to tell files apart without reading the audio
+HASH_SAMPLE_SIZE = 64 * 1024
+
+TAGGED = "tagged"
+REVIEW = "review"
+
+def content_hash(path, size):
+    """Returns a SHA-256 over the file size and the first and last HASH_SAMPLE_SIZE bytes."""
+    sha256 = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as file:
+        sha256.update(file.read(HASH_SAMPLE_SIZE))
+        if size > 2 * HASH_SAMPLE_SIZE:
+            file.seek(-HASH_SAMPLE_SIZE, os.SEEK_END)
+            sha256.update(file.read(HASH_SAMPLE_SIZE))
+    return sha256.hexdigest()
+
+class LibraryIndex:
+    """Remembers which files have been tagged, so later runs only touch new or changed files."""
+
+    def __init__(self, path):
+        """
+        Opens (or creates) the index database.
+
+        Parameters
+        ----------
+        path: str
+            The location of the SQLite database file.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        self.lock = threading.Lock()
+        # path -> (mtime_ns, size, hash, status), loaded on first use
+        self.rows = None
+        self.connection = sqlite3.connect(path, check_same_thread = False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                metadata TEXT,
+                updated REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS files_hash ON files (hash)")
+        self.connection.commit()
+
+    def load(self):
+        """Reads every entry into memory once, so checking a file only costs a stat."""
+        with self.lock:
+            if self.rows is None:
+                self.rows = {}
+                for path, mtime_ns, size, hash, status in self.connection.execute("SELECT path, mtime_ns, size, hash, status FROM files"):
+                    self.rows[path] = (mtime_ns, size, hash, status)
+
+    def is_pending(self, song):
+        """Returns True if the song is new, changed since it was tagged, or was never successfully tagged."""
+        self.load()
+        path = os.path.abspath(song)
+        row = self.rows.get(path)
+        if row is None or row[3] != TAGGED:
+            return True
+
+        stat = os.stat(path)
+        if (stat.st_mtime_ns, stat.st_size) == row[:2]:
+            return False
+        # the timestamp can change without the contents changing, e.g. after a copy
+        if stat.st_size == row[1] and content_hash(path, stat.st_size) == row[2]:
+            with self.lock:
+                self.rows[path] = (stat.st_mtime_ns,) + row[1:]
+                self.connection.execute("UPDATE files SET mtime_ns = ? WHERE path = ?", (stat.st_mtime_ns, path))
+                self.connection.commit()
+            return False
+        return True
+
+    def filter_pending(self, song_list):
+        """Returns the songs that still need processing, see is_pending."""
+        return [song for song in song_list if self.is_pending(song)]
+
+    def record(self, path, status, metadata = None, previous_path = None):
+        """
+        Records the current state of a file.
+
+        Parameters
+        ----------
+        path: str
+            The file's current path.
+        status: str
+            TAGGED if the file's metadata was written, REVIEW if it still needs a person to look at it.
+        metadata: dict | None
+            The metadata last written to the file.
+        previous_path: str | None
+            Where the file was before being renamed, its entry is removed.
+        """
+        path = os.path.abspath(path)
+        with instrumentation.span("index", file = os.path.basename(path)):
+            stat = os.stat(path)
+            hash = content_hash(path, stat.st_size)
+        with self.lock:
+            if previous_path is not None and os.path.abspath(previous_path) != path:
+                self.connection.execute("DELETE FROM files WHERE path = ?", (os.path.abspath(previous_path),))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, hash, status, metadata, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, stat.st_mtime_ns, stat.st_size, hash, status, None if metadata is None else json.dumps(metadata), time.time())
+            )
+            self.connection.commit()
+            if self.rows is not None:
+                if previous_path is not None:
+                    self.rows.pop(os.path.abspath(previous_path), None)
+                self.rows[path] = (stat.st_mtime_ns, stat.st_size, hash, status)
+
+    def tagged_metadata(self):
+        """Returns the metadata last written to every tagged file, as dicts."""
+        with self.lock:
+            rows = self.connection.execute("SELECT metadata FROM files WHERE status = ? AND metadata IS NOT NULL", (TAGGED,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
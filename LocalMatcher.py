@@ -0,0 +1,143 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, namedtuple
+from difflib import SequenceMatcher
+from LastFMProvider import parse_track
+
+Candidate = namedtuple("Candidate", ["title", "artist", "album", "score"])
+
+# weight of the title when scoring a candidate, the artist gets the rest
+TITLE_WEIGHT = 0.6
+# how many entries sharing the most trigrams with the search are scored exactly
+SHORTLIST_SIZE = 200
+
+def normalize(text):
+    """Lowercases, strips accents and punctuation, and collapses whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(character for character in text if not unicodedata.combining(character))
+    return " ".join(re.sub(r"[^\w]+", " ", text.casefold()).split())
+
+def trigrams(text):
+    """Returns the set of three character sequences in already normalized text, padded so word boundaries count."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(a, b):
+    """Returns how alike two pieces of normalized text are, from 0 to 1, tolerating typos and swapped letters."""
+    if a == "" or b == "":
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+def short_words(text):
+    """Returns the numbers and one or two letter words in normalized text, a typo in those usually means a different track."""
+    return [word for word in text.split() if len(word) <= 2 or word.isdigit()]
+
+class LocalMatcher:
+    """
+    Suggests tracks already known locally whose title and artist look like a search.
+
+    Titles are indexed by trigram so only entries sharing the most of them with a search are scored.
+    """
+
+    def __init__(self, min_score = 0.6, correct_score = 0.85):
+        """
+        Initializes an empty index. Call load() or add() to fill it.
+
+        Parameters
+        ----------
+        min_score: float
+            The lowest score, from 0 to 1, a candidate needs to be suggested.
+        correct_score: float
+            The lowest score a candidate needs to replace a search before it is sent to last.fm.
+        """
+        self.min_score = min_score
+        self.correct_score = correct_score
+        # filled from the prefetch threads as well as the UI thread
+        self.lock = threading.Lock()
+        # (title, artist, album, normalized title, normalized artist)
+        self.entries = []
+        # normalized (title, artist) -> position in entries
+        self.keys = {}
+        # trigram -> positions in entries whose title contains it
+        self.postings = {}
+
+    def load(self, library_index = None, response_cache = None, catalog = None):
+        """Adds everything written to the library, every track found in cached track.getInfo responses, and every track in a LocalProvider's catalog."""
+        if library_index is not None:
+            for metadata in library_index.tagged_metadata():
+                self.add(metadata["title"], metadata["artist"], metadata.get("album"))
+        if response_cache is not None:
+            for data in response_cache.bodies("track.getInfo"):
+                self.add_track_info(parse_track(data))
+        if catalog is not None:
+            for track in catalog.tracks():
+                self.add_track_info(track)
+
+    def add(self, title, artist, album = None):
+        """Adds a track, or fills in the album of one that is already known."""
+        if not title or not artist:
+            return
+
+        title_normalized = normalize(title)
+        artist_normalized = normalize(artist)
+        key = (title_normalized, artist_normalized)
+        with self.lock:
+            position = self.keys.get(key)
+            if position is not None:
+                if album is not None and self.entries[position][2] is None:
+                    self.entries[position] = (title, artist, album) + self.entries[position][3:]
+                return
+
+            position = len(self.entries)
+            self.entries.append((title, artist, album, title_normalized, artist_normalized))
+            self.keys[key] = position
+            for trigram in trigrams(title_normalized):
+                self.postings.setdefault(trigram, []).append(position)
+
+    def add_track_info(self, track):
+        """Adds a Provider.Track, if there is one."""
+        if track is None:
+            return
+        self.add(track.title, track.artist, None if track.album is None else track.album.title)
+
+    def match(self, title, artist, limit = 5):
+        """Returns up to limit candidates for the search, best first, that score at least min_score."""
+        title = normalize(title)
+        artist = normalize(artist)
+        with self.lock:
+            # only entries sharing the most title trigrams with the search are worth scoring
+            shared = Counter()
+            for trigram in trigrams(title):
+                shared.update(self.postings.get(trigram, ()))
+
+            candidates = []
+            for position, _ in shared.most_common(SHORTLIST_SIZE):
+                entry_title, entry_artist, album, entry_title_normalized, entry_artist_normalized = self.entries[position]
+                score = TITLE_WEIGHT * similarity(title, entry_title_normalized) + (1 - TITLE_WEIGHT) * similarity(artist, entry_artist_normalized)
+                if score >= self.min_score:
+                    candidates.append(Candidate(entry_title, entry_artist, album, score))
+
+        candidates.sort(key = lambda candidate: candidate.score, reverse = True)
+        return candidates[:limit]
+
+    def correct(self, title, artist):
+        """
+        Returns the candidate a search most likely misspells, or None if the search looks right or nothing is close enough.
+
+        Numbers and short words have to agree, so `Part 1` is never corrected to `Part 2` however similar the rest is.
+        """
+        candidates = self.match(title, artist, limit = 1)
+        if not candidates or candidates[0].score < self.correct_score:
+            return None
+
+        best = candidates[0]
+        if (normalize(best.title), normalize(best.artist)) == (normalize(title), normalize(artist)):
+            return None
+        if short_words(normalize(best.title)) != short_words(normalize(title)):
+            return None
+        return best
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
@@ -0,0 +1,191 @@
+import json
+import os
+import sqlite3
+import threading
+from LocalMatcher import normalize
+from LastFMProvider import parse_track, parse_album
+from Provider import Provider, Track, Album
+
+# the first bytes of every SQLite database, anything else is read as a dump
+SQLITE_HEADER = b"SQLite format 3\x00"
+# the most albums a search returns, as many as last.fm's first page
+SEARCH_LIMIT = 30
+
+def track_from_record(record, directory):
+    """Builds a Track from a dump or catalog record, see README.md for the fields."""
+    album = record.get("album")
+    return Track(
+        record["title"],
+        record["artist"],
+        playcount = record.get("playcount", -1),
+        tags = tuple(record.get("tags", ())),
+        number = record.get("number"),
+        mbid = record.get("mbid"),
+        artist_mbid = record.get("artist_mbid"),
+        album = None if album is None else album_from_record(album, directory)
+    )
+
+def album_from_record(record, directory):
+    """Builds an Album from a dump or catalog record. Tracklist entries without an artist get the album's."""
+    cover = record.get("cover_url")
+    # covers on disk may be given relative to the catalog, ones that are missing are left out
+    if cover is not None and "://" not in cover:
+        cover = os.path.join(directory, cover)
+        if not os.path.isfile(cover):
+            cover = None
+    return Album(
+        record["title"],
+        record["artist"],
+        cover,
+        tags = tuple(record.get("tags", ())),
+        year = record.get("year"),
+        mbid = record.get("mbid"),
+        tracks = tuple(track_from_record(dict({"artist": record["artist"]}, **entry), directory) for entry in record.get("tracks", ()))
+    )
+
+def to_record(value):
+    """Returns a Track or Album as a plain dict that can be written out as JSON, leaving out unknown fields."""
+    record = {}
+    for field, item in value._asdict().items():
+        if item is None or item == () or (field == "playcount" and item == -1):
+            continue
+        if field == "album":
+            item = to_record(item)
+        elif field == "tracks":
+            item = [to_record(track) for track in item]
+        record[field] = list(item) if isinstance(item, tuple) else item
+    return record
+
+class LocalProvider(Provider):
+    """
+    Answers lookups from a catalog on disk, without going to the network.
+
+    The catalog is either a SQLite database written by this class (see --export-catalog) or a dump with one JSON
+    object per line, which is loaded into memory when opened. Titles and artists are matched ignoring case,
+    accents, and punctuation.
+    """
+
+    name = "local"
+
+    def __init__(self, path):
+        """
+        Opens a catalog, creating an empty SQLite one if the file does not exist.
+
+        Parameters
+        ----------
+        path: str
+            The SQLite database or JSON Lines dump.
+        """
+        self.path = path
+        self.directory = os.path.dirname(os.path.abspath(path))
+        # True if the catalog is a dump, which is only held in memory and never written back
+        self.dump = False
+        if os.path.isfile(path):
+            with open(path, "rb") as file:
+                self.dump = file.read(len(SQLITE_HEADER)) != SQLITE_HEADER
+
+        # lookups happen on the prefetch threads as well as the UI thread
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(":memory:" if self.dump else path, check_same_thread = False)
+        for table in ("tracks", "albums"):
+            self.connection.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    title TEXT NOT NULL,
+                    artist TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    PRIMARY KEY (title, artist)
+                )
+            """)
+        self.connection.commit()
+        if self.dump:
+            self.load_dump(path)
+
+    def load_dump(self, path):
+        """Adds every track and album in a JSON Lines dump, each line an object with "type" set to "track" or "album"."""
+        with open(path, encoding = "utf-8") as dump:
+            for number, line in enumerate(dump, start = 1):
+                if line.strip() == "":
+                    continue
+                record = json.loads(line)
+                if record.get("type") == "track":
+                    self.add_track(track_from_record(record, self.directory), commit = False)
+                elif record.get("type") == "album":
+                    self.add_album(album_from_record(record, self.directory), commit = False)
+                else:
+                    raise ValueError(f"{path}:{number}: expected \"type\" to be \"track\" or \"album\"")
+        with self.lock:
+            self.connection.commit()
+
+    def add_track(self, track, commit = True):
+        """Adds a track, replacing one with the same title and artist."""
+        self.put("tracks", track, commit)
+
+    def add_album(self, album, commit = True):
+        """Adds an album, replacing one with the same title and artist."""
+        self.put("albums", album, commit)
+
+    def put(self, table, value, commit):
+        with self.lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO {table} (title, artist, body) VALUES (?, ?, ?)",
+                (normalize(value.title), normalize(value.artist), json.dumps(to_record(value)))
+            )
+            if commit:
+                self.connection.commit()
+
+    def import_responses(self, response_cache):
+        """Adds every track and album found in a last.fm response cache. Returns how many were added."""
+        added = 0
+        for method, parse, table in (("track.getInfo", parse_track, "tracks"), ("album.getInfo", parse_album, "albums")):
+            for data in response_cache.bodies(method):
+                value = parse(data)
+                if value is not None:
+                    self.put(table, value, commit = False)
+                    added = added + 1
+        with self.lock:
+            self.connection.commit()
+        return added
+
+    def tracks(self):
+        """Returns every track in the catalog, including the ones on album tracklists."""
+        with self.lock:
+            tracks = self.connection.execute("SELECT body FROM tracks").fetchall()
+            albums = self.connection.execute("SELECT body FROM albums").fetchall()
+        found = [track_from_record(json.loads(row[0]), self.directory) for row in tracks]
+        for row in albums:
+            album = album_from_record(json.loads(row[0]), self.directory)
+            found.extend(track._replace(album = album._replace(tracks = ())) for track in album.tracks)
+        return found
+
+    def find_track(self, title, artist):
+        with self.lock:
+            row = self.connection.execute("SELECT body FROM tracks WHERE title = ? AND artist = ?", (normalize(title), normalize(artist))).fetchone()
+        return None if row is None else track_from_record(json.loads(row[0]), self.directory)
+
+    def find_album(self, album_title, artist):
+        with self.lock:
+            row = self.connection.execute("SELECT body FROM albums WHERE title = ? AND artist = ?", (normalize(album_title), normalize(artist))).fetchone()
+        return None if row is None else album_from_record(json.loads(row[0]), self.directory)
+
+    def find_albums(self, album_title):
+        title = normalize(album_title)
+        # nothing but punctuation would match every album
+        if title == "":
+            return []
+        pattern = "%" + title.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        with self.lock:
+            # exact titles first, then titles containing the search
+            rows = self.connection.execute(
+                "SELECT body FROM albums WHERE title LIKE ? ESCAPE '\\' ORDER BY title != ?, title LIMIT ?",
+                (pattern, title, SEARCH_LIMIT)
+            ).fetchall()
+        # like last.fm's search results, without tracklists
+        return [album_from_record(json.loads(row[0]), self.directory)._replace(tracks = ()) for row in rows]
+
+    def __len__(self):
+        with self.lock:
+            return sum(self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("tracks", "albums"))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,519 +1,147 @@
-from dotenv import load_dotenv
+import argparse
 import os
-import re
-import customtkinter as ctk
-import requests
-from io import BytesIO
-import json
-import music_tag
-from WelcomePage import WelcomePage
-from SearchTrack import SearchTrack
-from TrackConfirmation import TrackConfirmation
-from TagSelection import TagSelection
-from AlbumConfirmation import AlbumConfirmation
-from SearchAlbum import SearchAlbum
-from AlbumSelection import AlbumSelection
-from ManualAlbumUpdate import ManualAlbumUpdate
 
-ENDPOINT = "https://ws.audioscrobbler.com/2.0/"
+# every other import happens in the mode that needs it, so --help and batch runs do not load the GUI and the
+# GUI does not load aiohttp
 
 def main():
+    parser = argparse.ArgumentParser(description = "Edit mp3 metadata using the last.fm API.")
+    parser.add_argument("--batch", metavar = "DIRECTORY", help = "tag the directory without the GUI, queueing anything that is not an exact match for review")
+    parser.add_argument("--allowed-tags", default = "", help = "comma-separated list of tags to accept in batch mode")
+    parser.add_argument("--denied-tags", default = "", help = "comma-separated list of tags to deny in batch mode")
+    parser.add_argument("--async", dest = "use_async", action = "store_true", help = "batch mode: resolve lookups concurrently with asyncio (requires aiohttp)")
+    parser.add_argument("--albums", action = "store_true", help = "batch mode: tag each folder as one album with a single album lookup")
+    parser.add_argument("--concurrency", type = int, default = 32, help = "batch mode with --async: the most lookups in flight at once")
+    # the same as PreScan.ORDERS, which is not imported here so that --help stays fast
+    parser.add_argument("--order", choices = ["scan", "manual-first", "manual-last"], default = "scan", help = "GUI: work through files in the order they are found, or put the ones that need a search typed in (or whose tags and filename disagree) first or last")
+    parser.add_argument("--all", dest = "process_all", action = "store_true", help = "process every file, including ones tagged in an earlier run")
+    parser.add_argument("--cover-size", type = int, default = 600, help = "largest width or height of embedded covers in pixels, 0 embeds covers unchanged")
+    parser.add_argument("--cover-quality", type = int, default = 85, help = "JPEG quality of embedded covers")
+    parser.add_argument("--trace", metavar = "FILE", help = "write per-stage timings and a trace of every scan, read, lookup, download, decode, and write to FILE, viewable in chrome://tracing or Perfetto")
+    parser.add_argument("--catalog", metavar = "FILE", help = "look tracks and albums up in a local catalog first, a SQLite database or a JSON Lines dump (see README.md)")
+    parser.add_argument("--offline", action = "store_true", help = "only use the catalog given with --catalog, never last.fm")
+    parser.add_argument("--export-catalog", metavar = "FILE", help = "write every track and album in the last.fm response cache to a SQLite catalog for --catalog, then exit")
+    parser.add_argument("--review-queue", metavar = "FILE", help = "batch mode: where files needing review are written (defaults to review-queue.jsonl in the directory); GUI: only process the files listed in it")
+    arguments = parser.parse_args()
+    if arguments.offline and arguments.catalog is None:
+        parser.error("--offline needs a --catalog to look tracks up in")
+    if arguments.use_async and (arguments.catalog is not None or arguments.offline):
+        parser.error("--async only looks tracks up on last.fm, it cannot be combined with --catalog or --offline")
+
+    if arguments.export_catalog is not None:
+        export_catalog(arguments.export_catalog)
+        return
+
+    from dotenv import load_dotenv
+    from Instrumentation import instrumentation
     load_dotenv()
-    key = os.environ["KEY"]
-
-    app = Application(key)
+    # not needed when only the catalog is used
+    key = os.environ.get("KEY", "") if arguments.offline else os.environ["KEY"]
+    if arguments.trace is not None:
+        instrumentation.start_trace()
+
+    if arguments.batch is not None:
+        run_batch_mode(key, arguments)
+        return
+
+    from Application import Application
+    app = Application(
+        key,
+        get_cache_directory(),
+        review_queue_path = arguments.review_queue,
+        process_all = arguments.process_all,
+        cover_size = arguments.cover_size,
+        cover_quality = arguments.cover_quality,
+        trace_path = arguments.trace,
+        order = arguments.order,
+        catalog_path = arguments.catalog,
+        offline = arguments.offline
+    )
     app.mainloop()
 
-class Application(ctk.CTk):
-    """The base application class for CTkinter that holds the entire UI."""
-
-    def __init__(self, key):
-        """Initializes window size, title, and display welcome page."""
-        super().__init__()
-        self.key = key
-
-        self.geometry("800x800")
-        self.title("TrackTagger")
-        self.grid_columnconfigure(0, weight = 1)
-
-        self.display_welcome_page()
-
-    # WelcomePage
-    def display_welcome_page(self):
-        """Displays a frame to collect the directory path and tag lists."""
-        welcome_page = WelcomePage(
-            self, 
-            lambda: self.on_click_continue_welcome_page(welcome_page)
-        )
-        welcome_page.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    def on_click_continue_welcome_page(self, welcome_page):
-        """Collects data from welcome page and begins processing data."""
-        self.directory_path = welcome_page.get_directory_path()
-        
-        # need to provide a directory, cannot be blank
-        if self.directory_path == "":
-            welcome_page.destroy()
-            welcome_page = WelcomePage(
-                self,
-                lambda: self.on_click_continue_welcome_page(welcome_page), 
-                invalid_directory = True
-            )
-            welcome_page.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        # user omitted the trailing slash, add it
-        if self.directory_path[-1] != '/':
-            self.directory_path += '/'
-        
-        # check if it is a valid directory
-        if not os.path.isdir(self.directory_path):
-            welcome_page.destroy()
-            welcome_page = WelcomePage(
-                self, 
-                lambda: self.on_click_continue_welcome_page(welcome_page), 
-                invalid_directory = True
-            )
-            welcome_page.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-            
-        self.allowed_tags = set(welcome_page.get_allowed_tags().split(", "))
-        self.denied_tags = set(welcome_page.get_denied_tags().split(", "))
-        welcome_page.destroy()
-
-        # add all files to a list to be processed
-        self.song_list = []
-        self.song_index = 0
-        for file in os.scandir(self.directory_path):
-            if not file.is_file() or file.name[-4:] != ".mp3":
-                continue
-
-            self.song_list.append(file)
-
-        self.process_song(None)
-
-    # SearchTrack
-    def on_click_search_search_track(self, search_track):
-        """Collects data from the search track page and begins processing a song."""
-        self.process_song(search_track)
-
-    def on_click_update_search_track(self, search_track):
-        """Collects data from the search track page and sets the title and artist. Moves immediately to album search."""
-        self.title = search_track.get_title()
-        self.artist = search_track.get_artist()
-        search_track.destroy()
-
-        # check for invalid input
-        if self.title == "" or self.artist == "":
-            search_track = SearchTrack(
-                self, 
-                "", 
-                "", 
-                self.filename, 
-                lambda: self.on_click_update_search_track(search_track), 
-                lambda: self.on_click_search_search_track(search_track), 
-                invalid = True
-            )
-            search_track.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        self.tags = []
-        self.album_found = False
-        tag_selection = TagSelection(
-            self,
-            self.title, 
-            self.artist,
-            self.tags, 
-            self.allowed_tags, 
-            self.denied_tags, lambda: self.on_click_continue_tag_selection(tag_selection)
-        )
-        tag_selection.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # TrackConfirmation
-    def on_click_yes_track_confirmation(self, track_confirmation):
-        """Destroys the track confirmation dialog and sets up tag dialog."""
-        track_confirmation.destroy()
-        tag_selection = TagSelection(
-            self, 
-            self.title, 
-            self.artist, 
-            self.tags, 
-            self.allowed_tags,
-            self.denied_tags, 
-            lambda: self.on_click_continue_tag_selection(tag_selection)
-        )
-        tag_selection.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    def on_click_no_track_confirmation(self, title_search, artist_search, track_confirmation):
-        """Destroys the track confirmation dialog and moves to search track dialog."""
-        track_confirmation.destroy()
-        search_track = SearchTrack(
-            self, 
-            title_search,
-            artist_search, 
-            self.filename, 
-            lambda: self.on_click_update_search_track(search_track), 
-            lambda: self.on_click_search_search_track(search_track)
-        )
-        search_track.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # TagSelection
-    def on_click_continue_tag_selection(self, tag_selection):
-        """Collects data from the tag selection dialog and proceeds to album selection."""
-        self.tags = tag_selection.get_selected_tags()
-
-        # add tags to the allowed list so they are auto-selected in the future
-        for tag in self.tags:
-            self.allowed_tags.add(tag)
-
-        tag_selection.destroy()
-
-        if self.album_found:
-            album_confirmation = AlbumConfirmation(
-                self,
-                self.title,
-                self.artist,
-                self.album_title,
-                self.album_artist,
-                self.cover,
-                lambda: self.on_click_yes_album_confirmation(album_confirmation),
-                lambda: self.on_click_no_album_confirmation(album_confirmation)
-            )
-            album_confirmation.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-        else:
-            album_search = SearchAlbum(
-                self, 
-                self.title, 
-                self.artist, 
-                lambda: self.on_click_update_album_search(album_search), 
-                lambda: self.on_click_search_album_search(album_search)
-            )
-            album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # AlbumConfirmation
-    def on_click_yes_album_confirmation(self, album_confirmation):
-        """Clears UI and writes out metadata for the current track."""
-        album_confirmation.destroy()
-        self.write_out_metadata()
-
-    def on_click_no_album_confirmation(self, album_confirmation):
-        """Clears the UI and goes back to AlbumSearch."""
-        album_confirmation.destroy()
-        album_search = SearchAlbum(
-            self, 
-            self.title,
-            self.artist,
-            lambda: self.on_click_update_album_search(album_search),
-            lambda: self.on_click_search_album_search(album_search)
-        )
-        album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # AlbumSearch
-    def on_click_update_album_search(self, album_search):
-        """"""
-        self.album_title = album_search.get_title()
-        album_search.destroy()
-
-        if self.album_title == "":
-            album_search = SearchAlbum(
-                self, 
-                self.title, 
-                self.artist, 
-                lambda: self.on_click_update_album_search(album_search), 
-                lambda: self.on_click_search_album_search(album_search), 
-                invalid = True
-            )
-            album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        manual_album_update = ManualAlbumUpdate(
-            self, 
-            self.title, 
-            self.artist, 
-            self.album_title, 
-            lambda: self.on_click_update_manual_album_update(manual_album_update),
-            lambda: self.on_click_back_manual_album_update(manual_album_update),
-        )
-        manual_album_update.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    def on_click_search_album_search(self, album_search):
-        """Calls SearchAlbum or AlbumSelection depending on the input."""
-        album_title_search = album_search.get_title()
-        album_search.destroy()
-
-        if album_title_search == "":
-            album_search = SearchAlbum(
-                self, 
-                self.title, 
-                self.artist,
-                lambda: self.on_click_update_album_search(album_search),
-                lambda: self.on_click_search_album_search(album_search),
-                invalid = True
-            )
-            album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        parameters = {
-            "method": "album.search",
-            "api_key": self.key,
-            "album": album_title_search,
-            "format": "json"
-        }
-        info = requests.get(ENDPOINT, params = parameters)
-        album_data = json.loads(info.text)
-        
-        # no albums found for given search criteria
-        if "results" not in album_data:
-            album_search = SearchAlbum(
-                self,
-                self.title,
-                self.artist, 
-                lambda: self.on_click_update_album_search(album_search),
-                lambda: self.on_click_search_album_search(album_search),
-                invalid = True
-            )
-            album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        self.albums = album_data["results"]["albummatches"]["album"]
-
-        album_selection = AlbumSelection(
-            self, 
-            self.title, 
-            self.artist, 
-            self.albums, 
-            lambda: self.on_click_continue_album_selection(album_selection), 
-            lambda: self.on_click_back_album_selection(album_selection)
-        )
-        album_selection.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # ManualAlbumUpdate
-    def on_click_update_manual_album_update(self, manual_album_update):
-        """Verifies provided album artist and cover path are valid, then writes out metadata."""
-        self.album_artist = manual_album_update.get_album_artist()
-        album_cover_path = manual_album_update.get_album_cover_path()
-        manual_album_update.destroy()
-
-        if self.album_artist == "" or album_cover_path == "":
-            manual_album_update = ManualAlbumUpdate(
-                self, 
-                self.title, 
-                self.artist, 
-                self.album_title, 
-                lambda: self.on_click_update_manual_album_update(manual_album_update),
-                lambda: self.on_click_back_manual_album_update(manual_album_update),
-                invalid = True
-            )
-            manual_album_update.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        # figure out if album cover path is actually an image file
-        if not os.path.isfile(album_cover_path) or not (album_cover_path.endsWith(".jpg") or album_cover_path.endsWith(".png") or album_cover_path.endsWith(".jpeg")):
-            manual_album_update = ManualAlbumUpdate(
-                self, 
-                self.title, 
-                self.artist, 
-                self.album_title, 
-                lambda: self.on_click_update_manual_album_update(manual_album_update),
-                lambda: self.on_click_back_manual_album_update(manual_album_update),
-                invalid_path = True
-            )
-            manual_album_update.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        with open(album_cover_path, 'rb') as image:
-            self.cover = image.read()
-            self.write_out_metadata()
-               
-    def on_click_back_manual_album_update(self, manual_album_update):
-        """Goes back to the SearchAlbum screen."""
-        manual_album_update.destroy()
-        album_search = SearchAlbum(
-            self,
-            self.title,
-            self.artist,
-            lambda: self.on_click_update_album_search(album_search),
-            lambda: self.on_click_search_album_search(album_search)
-        )
-        album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # AlbumSelection
-    def on_click_continue_album_selection(self, album_selection):
-        """Saves the album information and writes out metadata for the current track."""
-        self.album_index = album_selection.get_album_index()
-        album_selection.destroy()
-
-        self.album_title = self.albums[self.album_index]["name"]
-        self.album_artist = self.albums[self.album_index]["artist"]
-    
-        album_image_url = self.albums[self.album_index]["image"][-1]["#text"]
-        response = requests.get(album_image_url)
-        self.cover = response.content
-
-        self.write_out_metadata()
-
-    def on_click_back_album_selection(self, album_selection):
-        """Goes back to the SearchAlbum screen."""
-        album_selection.destroy()
-
-        album_search = SearchAlbum(
-            self, 
-            self.title, 
-            self.artist, 
-            lambda: self.on_click_update_album_search(album_search),
-            lambda: self.on_click_search_album_search(album_search)
-        )
-        album_search.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    # Utility
-    def process_song(self, search_track):
-        """First, checks to see if there is existing metadata. Next, uses the last.fm API to search for track info based on title and artist."""
-
-        print("entering process song")
-        # check to see if there are no more songs to handle
-        if self.song_index >= len(self.song_list):
-            print("end of song list")
-            if search_track is not None:
-                search_track.destroy()
-            thank_you_message = ctk.CTkLabel(master = self, text = "Thank you for using TrackTagger!", font = ("", 20))
-            thank_you_message.grid(row = 0, column = 0, padx = 20, pady = 20)
-            return
-
-        # no search, touching this particular track for the first time
-        if search_track is None:
-            print("track search was None")
-            self.filepath = self.song_list[self.song_index].path
-            self.filename = self.song_list[self.song_index].name
-
-            # check existing metadata for title and artist
-            file = music_tag.load_file(self.filepath)
-            title = str(file["title"])
-            artist = str(file["artist"])
-            # if present, no need to search, just ask user to verify
-            if title != "" and artist != "":
-                track_confirmation = TrackConfirmation(
-                    self, 
-                    title, 
-                    artist, 
-                    -1, 
-                    lambda: self.on_click_yes_track_confirmation(track_confirmation), 
-                    lambda: self.on_click_no_track_confirmation(title, artist, track_confirmation)
-                )
-                track_confirmation.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-                return
-
-            # see if filename is formatted for last.fm search
-            if " - " in self.filename:
-                title_search = self.filename.split(" - ")[0]
-                artist_search = self.filename.split(" - ")[1][:-4]
-            else:
-                filename = self.song_list[self.song_index].name
-                print("skip straight to search")
-                search_track = SearchTrack(
-                    self, 
-                    "", 
-                    "",
-                    self.filename,
-                    lambda: self.on_click_update_search_track(search_track), 
-                    lambda: self.on_click_search_search_track(search_track)
-                )
-                search_track.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-                return
-        # we got here because the user entered some criteria on SearchTrack
-        else:
-            print("getting title and artist from search track")
-            title_search = search_track.get_title()
-            artist_search = search_track.get_artist()
-            search_track.destroy()
-            print(f"{title_search}, {artist_search}")
-
-            if title_search == "" or artist_search == "":
-                filename = self.song_list[self.song_index].name
-                search_track = SearchTrack(
-                    self, 
-                    filename.split(" - ")[0], 
-                    filename.split(" - ")[1][:-4], 
-                    self.filename,
-                    lambda: self.on_click_update_search_track(search_track),
-                    lambda: self.on_click_search_search_track(search_track), 
-                    invalid = True
-                )
-                search_track.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-                return
-
-        # ready to search using last.fm, prepare the request
-        parameters = {
-            "method": "track.getInfo",
-            "api_key": self.key,
-            "track": title_search,
-            "artist": artist_search,
-            "format": "json"
-        }
-        info = requests.get(ENDPOINT, params = parameters)
-        data = json.loads(info.text)
-        print("went to last.fm")
-
-        if "track" not in data:
-            # no track found, must search 
-            search_track = SearchTrack(
-                self, 
-                title_search, 
-                artist_search, 
-                self.filename, 
-                lambda: self.on_click_update_search_track(search_track), 
-                lambda: self.on_click_search_search_track(search_track),
-            )
-            search_track.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-            return
-
-        self.title = data["track"]["name"]
-        self.artist = data["track"]["artist"]["name"]
-        playcount = data["track"]["playcount"]
-        
-        self.tags = []
-        for tag in data["track"]["toptags"]["tag"]:
-            self.tags.append(tag["name"].lower())
-
-        if "album" in data["track"]:
-            self.album_found = True
-            self.album_title = data["track"]["album"]["title"]
-            self.album_artist = data["track"]["album"]["artist"]
-            album_image_url = data["track"]["album"]["image"][-1]["#text"]
-            if album_image_url != "":
-                response = requests.get(album_image_url)
-                self.cover = response.content
-            else:
-                self.cover = None
-        else:
-            self.album_found = False
-
-        # display confirmation page for this track
-        track_confirmation = TrackConfirmation(
-            self, 
-            self.title, 
-            self.artist, 
-            playcount, 
-            lambda: self.on_click_yes_track_confirmation(track_confirmation), 
-            lambda: self.on_click_no_track_confirmation(title_search, artist_search, track_confirmation)
-        )
-        track_confirmation.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "ew")
-
-    def write_out_metadata(self):
-        """Writes saved data into the metadata of the current track file."""
-        file = music_tag.load_file(self.filepath)
-        file["title"] = self.title
-        file["artist"] = self.artist
-        file["album"] = self.album_title
-        file["albumartist"] = self.album_artist
-        if self.cover is not None:
-            file["artwork"] = BytesIO(self.cover).read()
-        file["genre"] = self.tags
-        file.save()
-
-        # remove illegal filepath characters from the title and artist before renaming
-        os.rename(self.filepath, f"{self.directory_path}{re.sub('[\\/:*?"<>|]', '', self.title)} - {re.sub('[\\/:*?"<>|]', '', self.artist)}.mp3")
-        self.song_index = self.song_index + 1
-        self.process_song(None)
+def run_batch_mode(key, arguments):
+    """Runs the headless tagger over the directory given on the command line."""
+    if not os.path.isdir(arguments.batch):
+        raise SystemExit(f"{arguments.batch} is not a directory")
+
+    from HttpClient import HttpClient
+    from LastFM import LastFM
+    from Provider import ProviderChain
+    from LastFMProvider import LastFMProvider
+    from LocalProvider import LocalProvider
+    from ResponseCache import ResponseCache
+    from ArtworkStore import ArtworkStore
+    from ArtworkNormalizer import ArtworkNormalizer
+    from LibraryIndex import LibraryIndex
+    from LocalMatcher import LocalMatcher
+    from Scanner import Scanner
+    from Instrumentation import instrumentation
+    from Batch import run_batch, run_batch_async, run_album_batch
+
+    review_queue_path = arguments.review_queue
+    if review_queue_path is None:
+        review_queue_path = os.path.join(arguments.batch, "review-queue.jsonl")
+
+    cache_directory = get_cache_directory()
+    client = HttpClient(max_connections = 16)
+    response_cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+    artwork_store = ArtworkStore(os.path.join(cache_directory, "artwork"), client)
+    normalizer = None
+    if arguments.cover_size > 0:
+        normalizer = ArtworkNormalizer(artwork_store, arguments.cover_size, arguments.cover_quality)
+    library_index = LibraryIndex(os.path.join(cache_directory, "library.sqlite3"))
+    # a local catalog answers before last.fm, or instead of it when offline
+    catalog = None if arguments.catalog is None else LocalProvider(arguments.catalog)
+    providers = [] if catalog is None else [catalog]
+    if not arguments.offline:
+        providers.append(LastFMProvider(LastFM(key, client, cache = response_cache)))
+    provider = ProviderChain(providers)
+    matcher = LocalMatcher()
+    matcher.load(library_index, response_cache, catalog)
+    # songs are tagged while the rest of the tree is still being walked
+    songs = Scanner(arguments.batch).start()
+    if not arguments.process_all:
+        songs = (song for song in songs if library_index.is_pending(song))
+    allowed_tags = set(arguments.allowed_tags.split(", "))
+    denied_tags = set(arguments.denied_tags.split(", "))
+
+    if arguments.albums:
+        written, queued = run_album_batch(provider, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index, normalizer)
+    elif arguments.use_async:
+        # aiohttp is only needed for this mode
+        import asyncio
+        from AsyncLastFM import AsyncLastFM
+        async_lastfm = AsyncLastFM(key, cache = response_cache, concurrency = arguments.concurrency)
+        written, queued = asyncio.run(run_batch_async(async_lastfm, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index, normalizer, matcher))
+    else:
+        written, queued = run_batch(provider, artwork_store, songs, allowed_tags, denied_tags, review_queue_path, library_index, normalizer, matcher)
+    print(f"{written} files tagged, {queued} queued for review in {review_queue_path}")
+    print(instrumentation.report())
+    if arguments.trace is not None:
+        instrumentation.export(arguments.trace)
+    client.close()
+
+def export_catalog(path):
+    """Writes the tracks and albums in the response cache to a catalog that --catalog can read on another machine."""
+    from ResponseCache import ResponseCache
+    from LocalProvider import LocalProvider
+
+    response_cache = ResponseCache(os.path.join(get_cache_directory(), "responses.sqlite3"))
+    catalog = LocalProvider(path)
+    if catalog.dump:
+        raise SystemExit(f"{path} is a dump, only SQLite catalogs can be written to")
+    added = catalog.import_responses(response_cache)
+    print(f"{added} tracks and albums written to {path}, {len(catalog)} in the catalog")
+    catalog.close()
+    response_cache.close()
+
+def get_cache_directory():
+    """Returns the directory used for persistent caches, following the XDG convention."""
+    base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "tracktagger")
 
 if __name__ == "__main__":
-    main()
+    # in a frozen release, the pre-scan's spawned workers start this script again and must not open a window
+    import multiprocessing
+    multiprocessing.freeze_support()
+    main()
\ No newline at end of file
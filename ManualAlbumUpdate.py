@@ -3,39 +3,28 @@ import customtkinter as ctk
 class ManualAlbumUpdate(ctk.CTkFrame):
     """Holds the UI to display dialog options for album artist and album cover."""
 
-    def __init__(self, master, title, artist, album_title, on_click_update, on_click_back, invalid = False, invalid_path = False):
+    def __init__(self, master, on_click_update, on_click_back):
         """
-        Initializes UI components.
+        Initializes UI components. Call refresh() to fill them in for a track.
 
         Parameters
         ----------
         master: CTk | CTkFrame
             The parent container of this frame.
-        title: str
-            The title of the current track.
-        artist: str
-            The artist of the current track.
-        album_title: str
-            The album title of the current track.
         on_click_update: Callable[]
             Defines on-click behavior for the update button.
         on_click_back: Callable[]
             Defines on-click behavior for the back button.
-        invalid: boolean
-           True if either the album artist or cover path were empty on update. 
-        invalid_path: boolean
-            True if the provided file path for album cover was invalid on update.
         """
         super().__init__(master)
 
         # center items horizontally
         self.columnconfigure(index = 0, weight = 1)
 
-        self.message_label = ctk.CTkLabel(master = self, text = f"The current track is {title} by {artist} and the current album is {album_title}.\nPlease enter an album artist and album cover or go back to the search page.", anchor = "w", justify = "left")
+        self.message_label = ctk.CTkLabel(master = self, text = "", anchor = "w", justify = "left")
         self.message_label.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "w")
 
         self.album_artist = ctk.CTkEntry(master = self, width = 400, placeholder_text = "album artist")
-        self.album_artist.insert(0, artist)
         self.album_artist.grid(row = 1, column = 0, padx = 20, sticky = "w")
 
         self.album_cover_path = ctk.CTkEntry(master = self, width = 400, placeholder_text = "/path/to/cover.png")
@@ -50,13 +39,39 @@ class ManualAlbumUpdate(ctk.CTkFrame):
         self.update_button = ctk.CTkButton(master = self.sub_frame, text = "update", command = on_click_update)
         self.update_button.grid(row = 0, column = 1, padx = 20, pady = 20)
 
+        self.invalid_label = ctk.CTkLabel(master = self, text = f"Please enter valid criteria for album artist and cover path.", text_color = "red")
+        self.invalid_path_label = ctk.CTkLabel(master = self, text = f"Invalid album cover path.", text_color = "red")
+
+    def refresh(self, title, artist, album_title, invalid = False, invalid_path = False):
+        """
+        Updates the page in place instead of building a new one.
+
+        Parameters
+        ----------
+        title: str
+            The title of the current track.
+        artist: str
+            The artist of the current track.
+        album_title: str
+            The album title of the current track.
+        invalid: boolean
+           True if either the album artist or cover path were empty on update. 
+        invalid_path: boolean
+            True if the provided file path for album cover was invalid on update.
+        """
+        self.message_label.configure(text = f"The current track is {title} by {artist} and the current album is {album_title}.\nPlease enter an album artist and album cover or go back to the search page.")
+
+        self.invalid_label.grid_remove()
+        self.invalid_path_label.grid_remove()
         if invalid:
-            self.invalid_label = ctk.CTkLabel(master = self, text = f"Please enter valid criteria for album artist and cover path.", text_color = "red")
             self.invalid_label.grid(row = 4, column = 0, padx = 20, pady = 20, sticky = "w")
         elif invalid_path:
-            self.invalid_path_label = ctk.CTkLabel(master = self, text = f"Invalid album cover path.", text_color = "red")
             self.invalid_path_label.grid(row = 4, column = 0, padx = 20, pady = 20, sticky = "w")
-                
+        else:
+            # a fresh visit, what was typed for the previous track no longer applies
+            self.album_artist.delete(0, "end")
+            self.album_artist.insert(0, artist)
+            self.album_cover_path.delete(0, "end")
 
     def get_album_artist(self):
         return self.album_artist.get()
@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import Engine
+from LibraryIndex import TAGGED
+
+class WriteResult:
+    """The outcome of writing one job."""
+
+    def __init__(self, job, previous_path, error = None):
+        """
+        Parameters
+        ----------
+        job: TrackJob
+            The job that was written. Its filepath is the new path if the write succeeded.
+        previous_path: str
+            The path of the file before it was written and renamed.
+        error: Exception | None
+            Why the write failed, None if it succeeded.
+        """
+        self.job = job
+        self.previous_path = previous_path
+        self.error = error
+
+class MetadataWriter:
+    """Writes jobs to disk on a pool of worker threads so the caller can move on to the next track immediately."""
+
+    def __init__(self, library_index = None, normalizer = None, workers = 2, max_pending = 8):
+        """
+        Initializes the worker pool.
+
+        Parameters
+        ----------
+        library_index: LibraryIndex | None
+            Where successful writes are recorded.
+        normalizer: ArtworkNormalizer | None
+            Shrinks covers before they are embedded. Covers are embedded as they are if None.
+        workers: int
+            How many files are written at once.
+        max_pending: int
+            The most jobs waiting or being written. submit() blocks beyond this, check full() first to avoid that.
+        """
+        self.library_index = library_index
+        self.normalizer = normalizer
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "writer")
+        self.max_pending = max_pending
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.results = []
+        self.written = 0
+        self.failed = 0
+
+    def full(self):
+        """Returns True if submit() would block."""
+        with self.lock:
+            return self.pending >= self.max_pending
+
+    def submit(self, job):
+        """Queues a job to be written, blocking while max_pending jobs are already queued."""
+        self.slots.acquire()
+        with self.lock:
+            self.pending += 1
+        self.executor.submit(self.write, job)
+
+    def write(self, job):
+        previous_path = job.filepath
+        try:
+            if self.normalizer is not None:
+                job.cover = self.normalizer.normalize(job.cover)
+            Engine.write(job)
+            if self.library_index is not None:
+                self.library_index.record(job.filepath, TAGGED, Engine.metadata(job), previous_path)
+            result = WriteResult(job, previous_path)
+        except Exception as exception:
+            result = WriteResult(job, previous_path, exception)
+
+        with self.lock:
+            self.pending -= 1
+            if result.error is None:
+                self.written += 1
+            else:
+                self.failed += 1
+            self.results.append(result)
+        self.slots.release()
+
+    def poll(self):
+        """Returns the results finished since the last call."""
+        with self.lock:
+            results = self.results
+            self.results = []
+        return results
+
+    def close(self):
+        """Waits for every queued job to be written."""
+        self.executor.shutdown(wait = True)
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import Engine
+from ID3Reader import ID3Reader
+
+# the groups files are sorted into before any lookups, from least to most work for the user
+FULLY_TAGGED = "tagged"
+HAS_TAGS = "tags"
+FILENAME = "filename"
+UNPARSEABLE = "unparseable"
+GROUPS = [FULLY_TAGGED, HAS_TAGS, FILENAME, UNPARSEABLE]
+GROUP_NAMES = {
+    FULLY_TAGGED: "fully tagged",
+    HAS_TAGS: "with title and artist",
+    FILENAME: "named Title - Artist",
+    UNPARSEABLE: "needing a search typed in"
+}
+
+# the orders a session can work through its files in
+SCAN_ORDER = "scan"
+MANUAL_FIRST = "manual-first"
+MANUAL_LAST = "manual-last"
+ORDERS = [SCAN_ORDER, MANUAL_FIRST, MANUAL_LAST]
+
+# path: the file, group: one of GROUPS, mismatch: True if its tags and filename name different tracks
+Classification = namedtuple("Classification", ["path", "group", "mismatch"])
+
+def classify_name(path):
+    """Returns the Classification of a file from its name alone."""
+    return Classification(path, FILENAME if Engine.parse_filename(Engine.TrackJob(path)) else UNPARSEABLE, False)
+
+def classify(path):
+    """Returns the Classification of a file from its tags and name. Runs in the worker processes."""
+    named = Engine.TrackJob(path)
+    parseable = Engine.parse_filename(named)
+    try:
+        tags = ID3Reader(path)
+    except Exception:
+        # unreadable files and broken tags are reported when the file is opened for real, without tags
+        # it needs a search like any other
+        return classify_name(path)
+
+    tagged = tags["title"] != "" and tags["artist"] != ""
+    if tagged and tags["album"] != "" and tags["albumartist"] != "" and tags.cover:
+        group = FULLY_TAGGED
+    elif tagged:
+        group = HAS_TAGS
+    elif parseable:
+        group = FILENAME
+    else:
+        group = UNPARSEABLE
+
+    mismatch = tagged and parseable and (
+        Engine.normalize(tags["title"]) != Engine.normalize(named.title_search) or
+        Engine.normalize(tags["artist"]) != Engine.normalize(named.artist_search)
+    )
+    return Classification(path, group, mismatch)
+
+def classify_all(paths):
+    """Classifies a chunk of files, so every task sent to a worker is worth the round trip."""
+    return [classify(path) for path in paths]
+
+def needs_input(classification):
+    """Returns True if the user will have to type a search or decide between the tags and the filename."""
+    return classification.group == UNPARSEABLE or classification.mismatch
+
+def order_songs(classifications, order):
+    """Returns the paths of the classified files in the given order, keeping scan order within each part."""
+    if order == MANUAL_FIRST:
+        classifications = sorted(classifications, key = lambda classification: not needs_input(classification))
+    elif order == MANUAL_LAST:
+        classifications = sorted(classifications, key = needs_input)
+    return [classification.path for classification in classifications]
+
+class PreScan:
+    """
+    Sorts files into GROUPS on a pool of processes, so a session knows what it is in for before it starts.
+
+    Only the ID3 headers are read, see ID3Reader. Files are handed out in chunks as they are submitted
+    and the results come back in the same order, so the scan order is kept.
+    """
+
+    def __init__(self, workers = None, chunk_size = 64):
+        """
+        Initializes the pre-scan. No process is started until files are submitted.
+
+        Parameters
+        ----------
+        workers: int | None
+            How many processes read files at once, one per CPU if None.
+        chunk_size: int
+            The most files handed to a process at a time.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.executor = None
+        self.futures = deque()
+
+        self.submitted = 0
+        self.classified = 0
+        self.counts = {group: 0 for group in GROUPS}
+        self.mismatches = 0
+
+    @property
+    def done(self):
+        return self.classified == self.submitted
+
+    def submit(self, paths):
+        """Starts classifying the files in the background."""
+        if not paths:
+            return
+        if self.executor is None:
+            # spawned rather than forked, forking a process that runs Tk and other threads is not safe
+            self.executor = ProcessPoolExecutor(max_workers = self.workers, mp_context = multiprocessing.get_context("spawn"))
+        for start in range(0, len(paths), self.chunk_size):
+            chunk = paths[start:start + self.chunk_size]
+            self.futures.append((self.executor.submit(classify_all, chunk), chunk))
+            self.submitted += len(chunk)
+
+    def poll(self):
+        """Returns the classifications finished since the last poll, in the order the files were submitted."""
+        finished = []
+        while self.futures and self.futures[0][0].done():
+            future, chunk = self.futures.popleft()
+            try:
+                classifications = future.result()
+            except Exception:
+                # a worker that died takes its chunk with it; reading those files again here could fail the same
+                # way on the UI thread, so they are classified by name only
+                classifications = [classify_name(path) for path in chunk]
+            for classification in classifications:
+                self.counts[classification.group] += 1
+                self.mismatches += classification.mismatch
+                finished.append(classification)
+        self.classified += len(finished)
+        return finished
+
+    def summary(self):
+        """Returns the totals so far as one line of text."""
+        parts = [f"{self.counts[group]} {GROUP_NAMES[group]}" for group in GROUPS if self.counts[group]]
+        if self.mismatches:
+            parts.append(f"{self.mismatches} with tags and filename disagreeing")
+        line = f"{self.classified} of {self.submitted} files"
+        if parts:
+            line += ": " + ", ".join(parts)
+        return line
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures = True)
+            self.executor = None
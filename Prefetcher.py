@@ -0,0 +1,79 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import Engine
+
+def prepare_all(provider, artwork_store, songs, depth = 16, workers = 8, search_existing = False, matcher = None):
+    """
+    Yields a prepared job for every song, in order, while up to depth songs ahead are prepared in the background.
+
+    songs may be a lazy iterable such as a running Scanner, work starts as soon as the first song arrives. A song
+    whose file cannot be read or looked up is yielded as a job with its error set, see Engine.failed_job.
+    """
+    with ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "prefetch") as executor:
+        window = deque()
+        for song in songs:
+            window.append((song, executor.submit(Engine.prepare, provider, artwork_store, song, search_existing, matcher)))
+            if len(window) > depth:
+                yield finished_job(*window.popleft())
+        while window:
+            yield finished_job(*window.popleft())
+
+def finished_job(song, future):
+    """Waits for a job being prepared, returning a failed job rather than raising."""
+    try:
+        return future.result()
+    except Exception as error:
+        return Engine.failed_job(song, error)
+
+class Prefetcher:
+    """Prepares jobs on a pool of background threads ahead of the song currently displayed."""
+
+    def __init__(self, provider, artwork_store, song_list, depth = 5, workers = 4, search_existing = False, matcher = None):
+        """
+        Initializes the worker pool.
+
+        Parameters
+        ----------
+        provider: Provider
+            Where tracks and albums are looked up.
+        artwork_store: ArtworkStore
+            Where album covers are fetched from.
+        song_list: List[str]
+            Paths of the songs that will be processed, in order.
+        depth: int
+            How many songs after the current one to look up in advance.
+        workers: int
+            The number of background threads.
+        search_existing: bool
+            True to look up a song's existing title and artist instead of leaving them for the user to verify.
+        matcher: LocalMatcher | None
+            Corrects misspelled searches and suggests tracks when the lookup finds nothing.
+        """
+        self.provider = provider
+        self.artwork_store = artwork_store
+        self.song_list = song_list
+        self.depth = depth
+        self.search_existing = search_existing
+        self.matcher = matcher
+        self.executor = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = "prefetch")
+        self.futures = {}
+
+    def prefetch(self, index):
+        """Schedules jobs for the song at index and the songs following it."""
+        # forget anything behind the current song
+        for stale in [i for i in self.futures if i < index]:
+            self.futures.pop(stale).cancel()
+
+        for i in range(index, min(index + self.depth + 1, len(self.song_list))):
+            if i not in self.futures:
+                self.futures[i] = self.executor.submit(Engine.prepare, self.provider, self.artwork_store, self.song_list[i], self.search_existing, self.matcher)
+
+    def get(self, index):
+        """Returns the job for the song at index, waiting for it only if it is not finished yet."""
+        self.prefetch(index)
+        return self.futures.pop(index).result()
+
+    def shutdown(self):
+        """Stops the worker pool without waiting for outstanding lookups."""
+        self.executor.shutdown(wait = False, cancel_futures = True)
+        self.futures.clear()
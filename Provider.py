@@ -0,0 +1,114 @@
+import time
+from collections import namedtuple
+from Instrumentation import instrumentation
+
+# a track as every provider reports it; number is its position on the album, playcount -1 if unknown, and
+# album an Album without tags, year, or tracks, None if the track is not known to be on one
+Track = namedtuple(
+    "Track",
+    ["title", "artist", "playcount", "tags", "number", "mbid", "artist_mbid", "album"],
+    defaults = [-1, (), None, None, None, None]
+)
+# an album as every provider reports it; cover_url is a web address or a file on disk, None if there is no cover,
+# and tracks its tracklist as Tracks in order, empty for search results
+Album = namedtuple(
+    "Album",
+    ["title", "artist", "cover_url", "tags", "year", "mbid", "tracks"],
+    defaults = [None, (), None, None, ()]
+)
+
+class ProviderError(Exception):
+    """Raised when a provider could not answer at all, for example because the network is down, as opposed to not knowing the answer."""
+
+class Provider:
+    """
+    Looks up track and album metadata in one source. Subclasses implement find_track, find_album, and find_albums.
+
+    Every lookup is timed under `lookup.<name>` and counted as found, missed, or failed, so sources can be compared
+    in the instrumentation report.
+    """
+
+    name = "provider"
+
+    def track(self, title, artist):
+        """Returns the Track with the given title and artist, or None if the provider does not know it."""
+        return self.lookup(self.find_track, title, artist)
+
+    def album(self, album_title, artist):
+        """Returns the Album with the given title and artist, including its tracklist, or None if the provider does not know it."""
+        return self.lookup(self.find_album, album_title, artist)
+
+    def search_albums(self, album_title):
+        """Returns the Albums whose title looks like the given one, best first, without their tracklists."""
+        return self.lookup(self.find_albums, album_title) or []
+
+    def lookup(self, find, *arguments):
+        start = time.perf_counter()
+        outcome = "failed"
+        try:
+            result = find(*arguments)
+            outcome = "found" if result else "missed"
+            return result
+        finally:
+            instrumentation.record(f"lookup.{self.name}", start, time.perf_counter(), {"method": find.__name__, "outcome": outcome})
+            instrumentation.count(f"lookup.{self.name}.{outcome}")
+
+    def find_track(self, title, artist):
+        raise NotImplementedError
+
+    def find_album(self, album_title, artist):
+        raise NotImplementedError
+
+    def find_albums(self, album_title):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class ProviderChain(Provider):
+    """
+    Asks several providers in turn, for example a local catalog before last.fm, and returns the first answer.
+
+    A provider that fails is skipped. If none of them knew the answer and one of them failed, its error is raised,
+    since the answer may well exist where it could not be asked.
+    """
+
+    name = "chain"
+
+    def __init__(self, providers):
+        """
+        Initializes the chain.
+
+        Parameters
+        ----------
+        providers: List[Provider]
+            The providers to ask, in order.
+        """
+        self.providers = providers
+
+    def ask(self, method, *arguments):
+        error = None
+        for provider in self.providers:
+            try:
+                result = getattr(provider, method)(*arguments)
+            except ProviderError as exception:
+                error = exception
+                continue
+            if result:
+                return result
+        if error is not None:
+            raise error
+        return None
+
+    def find_track(self, title, artist):
+        return self.ask("track", title, artist)
+
+    def find_album(self, album_title, artist):
+        return self.ask("album", album_title, artist)
+
+    def find_albums(self, album_title):
+        return self.ask("search_albums", album_title)
+
+    def close(self):
+        for provider in self.providers:
+            provider.close()
@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from Instrumentation import instrumentation
+
+DAY = 24 * 60 * 60
+
+# how long a cached response stays valid, per API method
+DEFAULT_TTLS = {
+    "track.getInfo": 30 * DAY,
+    "album.search": 7 * DAY,
+    "album.getInfo": 30 * DAY,
+}
+DEFAULT_TTL = DAY
+
+class ResponseCache:
+    """Persists decoded last.fm responses in SQLite so repeated lookups never hit the network."""
+
+    def __init__(self, path, ttls = None, max_bytes = 64 * 1024 * 1024):
+        """
+        Opens (or creates) the cache database.
+
+        Parameters
+        ----------
+        path: str
+            The location of the SQLite database file.
+        ttls: dict[str, float]
+            Seconds a response stays valid, keyed by API method. Defaults to DEFAULT_TTLS.
+        max_bytes: int
+            The total size of stored responses before least recently used entries are evicted.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # lookups happen on the prefetch threads as well as the UI thread
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread = False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                method TEXT NOT NULL,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.connection.commit()
+        self.total_bytes = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(parameters):
+        """Builds a cache key from the request parameters, ignoring the API key, format, and letter case."""
+        normalized = []
+        for name in sorted(parameters):
+            if name in ("api_key", "format"):
+                continue
+            value = " ".join(str(parameters[name]).split())
+            if name != "method":
+                value = value.casefold()
+            normalized.append(f"{name}={value}")
+        return "&".join(normalized)
+
+    def get(self, parameters):
+        """Returns the cached response for the given parameters, or None if it is missing or expired."""
+        key = self.make_key(parameters)
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT body, size, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[2] > self.ttls.get(parameters["method"], DEFAULT_TTL):
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.connection.commit()
+                self.total_bytes -= row[1]
+                row = None
+
+            if row is None:
+                self.misses += 1
+                instrumentation.count("cache.misses")
+                return None
+
+            self.hits += 1
+            instrumentation.count("cache.hits")
+            self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+        return json.loads(row[0])
+
+    def put(self, parameters, data):
+        """Stores a response, evicting the least recently used entries if the cache grows too large."""
+        key = self.make_key(parameters)
+        body = json.dumps(data)
+        size = len(body.encode())
+        now = time.time()
+        with self.lock:
+            previous = self.connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if previous is not None:
+                self.total_bytes -= previous[0]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, method, body, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, parameters["method"], body, size, now, now)
+            )
+            self.total_bytes += size
+            self.evict()
+            self.connection.commit()
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes. Expects the lock to be held."""
+        if self.total_bytes <= self.max_bytes:
+            return
+
+        excess = self.total_bytes - self.max_bytes
+        victims = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            self.total_bytes -= size
+            if excess <= 0:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.evictions += len(victims)
+
+    def bodies(self, method):
+        """Returns every stored response for an API method, expired or not, without counting hits."""
+        with self.lock:
+            rows = self.connection.execute("SELECT body FROM responses WHERE method = ?", (method,)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self):
+        """Returns the hit, miss, and eviction counters along with the current size."""
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self.total_bytes
+        }
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
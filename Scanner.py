@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from Engine import TEMPORARY_PREFIX
+from Instrumentation import instrumentation
+
+# marks the end of a scan in the results queue
+DONE = object()
+
+class Scanner:
+    """Walks a directory tree on a pool of threads, handing out mp3 files as soon as they are found."""
+
+    def __init__(self, directory_path, extensions = (".mp3",), workers = 8):
+        """
+        Initializes the scanner. Nothing is read until start() is called.
+
+        Parameters
+        ----------
+        directory_path: str
+            The root of the tree to walk. Nested folders are walked too.
+        extensions: Tuple[str]
+            File extensions to collect, compared case-insensitively.
+        workers: int
+            How many directories are listed at once. Helps most on network storage.
+        """
+        self.directory_path = directory_path
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.workers = workers
+        self.results = queue.Queue()
+        self.done = False
+        self.found = 0
+
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.executor = None
+
+    def start(self):
+        """Begins walking the tree in the background. Returns the scanner for chaining."""
+        self.executor = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = "scan")
+        self.submit(self.directory_path)
+        return self
+
+    def submit(self, directory_path):
+        with self.lock:
+            self.outstanding += 1
+        self.executor.submit(self.scan_directory, directory_path)
+
+    def scan_directory(self, directory_path):
+        """Lists one directory, queueing its songs and submitting its subdirectories."""
+        try:
+            songs = []
+            with instrumentation.span("scan", directory = directory_path), os.scandir(directory_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks = False):
+                            self.submit(entry.path)
+                        elif entry.is_file() and entry.name.lower().endswith(self.extensions) and not entry.name.startswith(TEMPORARY_PREFIX):
+                            songs.append(entry.path)
+                    except OSError:
+                        # entries can vanish or be unreadable mid-scan, skip them
+                        continue
+            instrumentation.count("files.scanned", len(songs))
+            for song in sorted(songs):
+                self.results.put(song)
+        except OSError as exception:
+            print(f"could not scan {directory_path}: {exception}")
+        finally:
+            with self.lock:
+                self.outstanding -= 1
+                finished = self.outstanding == 0
+            if finished:
+                self.results.put(DONE)
+                self.executor.shutdown(wait = False)
+
+    def poll(self):
+        """Returns the songs found since the last call without waiting. Check done to see if more will come."""
+        songs = []
+        while True:
+            try:
+                song = self.results.get_nowait()
+            except queue.Empty:
+                return songs
+            if song is DONE:
+                self.done = True
+                return songs
+            self.found += 1
+            songs.append(song)
+
+    def __iter__(self):
+        """Yields songs as they are found, blocking until the whole tree has been walked."""
+        while not self.done:
+            song = self.results.get()
+            if song is DONE:
+                self.done = True
+                return
+            self.found += 1
+            yield song
@@ -1,41 +1,34 @@
 import customtkinter as ctk
 
+# the most suggestions shown at once
+SUGGESTIONS_COUNT = 3
+
 class SearchTrack(ctk.CTkFrame):
     """Holds the UI for searching for a track by title and artist."""
 
-    def __init__(self, master, title, artist, filename, on_click_update, on_click_search, invalid = False):
+    def __init__(self, master, on_click_update, on_click_search):
         """
-        Initializes UI components.
+        Initializes UI components. Call refresh() to fill them in for a track.
 
         Parameters
         ----------
         master: CTk | CTkFrame
             Parent container of this frame.
-        title: str
-            The title of the track that couldn't be found.
-        artist: str
-            The artist of the track that couldn't be found.
         on_click_update: Callable[]
             Defines on-click behavior for the update button.
         on_click_search: Callable[]
             Defines on-click behavior for the search button.
-        invalid: boolean
-            True if either search criteria is blank or no results are found.
         """
         super().__init__(master)
 
         # center items horizontally
         self.grid_columnconfigure(0, weight = 1)
 
-        if title == "" or artist == "":
-            self.message_label = ctk.CTkLabel(master = self, text = f"Could not search for file {filename}. Please search for a track or update the title and artist manually.")
-        else:
-            self.message_label = ctk.CTkLabel(master = self, text = f"Track {title} by {artist} not found. Please search for a track or update title and artist manually.")
+        self.message_label = ctk.CTkLabel(master = self, text = "")
         self.message_label.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "w")
 
         self.title = ctk.CTkEntry(master = self, width = 400, placeholder_text = "title")
         self.title.grid(row = 1, column = 0, padx = 20, sticky = "w")
-        self.title.focus_set()
 
         self.artist = ctk.CTkEntry(master = self, width = 400, placeholder_text = "artist")
         self.artist.grid(row = 2, column = 0, padx = 20, pady = (5, 20), sticky = "w")
@@ -49,9 +42,70 @@ class SearchTrack(ctk.CTkFrame):
         self.search_button = ctk.CTkButton(master = self.sub_frame, text = "search", command = on_click_search)
         self.search_button.grid(row = 0, column = 1, padx = 20, pady = 20)
 
+        # tracks known locally that look like the search, clicking one searches for it
+        self.on_click_search = on_click_search
+        self.suggestion_frame = ctk.CTkFrame(self)
+        self.suggestion_frame.grid_columnconfigure(0, weight = 1)
+        self.suggestion_label = ctk.CTkLabel(master = self.suggestion_frame, text = "Did you mean:")
+        self.suggestion_label.grid(row = 0, column = 0, padx = 20, pady = (10, 0), sticky = "w")
+        self.suggestion_buttons = []
+        for i in range(SUGGESTIONS_COUNT):
+            button = ctk.CTkButton(master = self.suggestion_frame, text = "", anchor = "w")
+            button.grid(row = i + 1, column = 0, padx = 20, pady = (5, 10 if i == SUGGESTIONS_COUNT - 1 else 0), sticky = "ew")
+            self.suggestion_buttons.append(button)
+
+        self.invalid_label = ctk.CTkLabel(master = self, text = f"Please provide valid criteria.", text_color = "red")
+
+    def refresh(self, title, artist, filename, invalid = False, suggestions = ()):
+        """
+        Updates the page in place instead of building a new one.
+
+        Parameters
+        ----------
+        title: str
+            The title of the track that couldn't be found.
+        artist: str
+            The artist of the track that couldn't be found.
+        filename: str
+            The name of the file being processed.
+        invalid: boolean
+            True if either search criteria is blank or no results are found. Keeps what was typed so it can be corrected.
+        suggestions: List[Candidate]
+            Tracks known locally that look like the search, best first.
+        """
+        if title == "" or artist == "":
+            self.message_label.configure(text = f"Could not search for file {filename}. Please search for a track or update the title and artist manually.")
+        else:
+            self.message_label.configure(text = f"Track {title} by {artist} not found. Please search for a track or update title and artist manually.")
+
+        suggestions = suggestions[:SUGGESTIONS_COUNT]
+        if suggestions:
+            for i, button in enumerate(self.suggestion_buttons):
+                if i < len(suggestions):
+                    candidate = suggestions[i]
+                    button.configure(text = f"{candidate.title} by {candidate.artist}", command = lambda candidate = candidate: self.on_click_suggestion(candidate))
+                    button.grid()
+                else:
+                    button.grid_remove()
+            self.suggestion_frame.grid(row = 5, column = 0, padx = 20, pady = (0, 20), sticky = "ew")
+        else:
+            self.suggestion_frame.grid_remove()
+
         if invalid:
-            self.invalid_label = ctk.CTkLabel(master = self, text = f"Please provide valid criteria.", text_color = "red")
             self.invalid_label.grid(row = 4, column = 0, padx = 20, pady = (0, 20), sticky = "w")
+        else:
+            self.invalid_label.grid_remove()
+            self.title.delete(0, "end")
+            self.artist.delete(0, "end")
+        self.title.focus_set()
+
+    def on_click_suggestion(self, candidate):
+        """Fills in the suggested title and artist and searches for them."""
+        self.title.delete(0, "end")
+        self.title.insert(0, candidate.title)
+        self.artist.delete(0, "end")
+        self.artist.insert(0, candidate.artist)
+        self.on_click_search()
 
     def get_title(self):
         return self.title.get()
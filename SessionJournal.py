@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import Engine
+
+# fields of a TrackJob that are saved as they are, the cover is saved by hash
+JOB_FIELDS = [
+    "filepath", "filename", "title_search", "artist_search", "existing", "found", "corrected_from",
+    "title", "artist", "playcount", "tags", "album_title", "album_artist",
+    "track_number", "total_tracks", "year", "mbids"
+]
+
+# how far the user got with the current song, see SessionState.job_stage
+TRACK_CONFIRMED = "track"
+TAGS_SELECTED = "tags"
+
+def save_job(job, artwork_store):
+    """Returns a job as a JSON-compatible dict, storing its cover in the artwork store."""
+    saved = {field: getattr(job, field) for field in JOB_FIELDS}
+    saved["cover"] = None if job.cover is None else artwork_store.add(job.cover)
+    return saved
+
+def load_job(saved, artwork_store):
+    """Rebuilds a job saved with save_job."""
+    job = Engine.TrackJob(saved["filepath"])
+    for field in JOB_FIELDS:
+        setattr(job, field, saved[field])
+    if job.corrected_from is not None:
+        job.corrected_from = tuple(job.corrected_from)
+    job.cover = None if saved["cover"] is None else artwork_store.load(saved["cover"])
+    return job
+
+class SessionState:
+    """Where a session stood when its journal was last written to."""
+
+    def __init__(self):
+        # every song found, in the order they are processed
+        self.songs = []
+        # True if the scanner finished, so the song list is complete
+        self.scanned = False
+        # position in songs of the song being worked on
+        self.index = 0
+        # tags the user selected, they are pre-selected from then on
+        self.allowed_tags = set()
+        # jobs handed to the writer that were not confirmed written, keyed by their original path
+        self.pending_writes = {}
+        # the song being worked on and how far along it is, None if nothing was decided yet
+        self.job = None
+        self.job_stage = None
+
+class SessionJournal:
+    """
+    Appends every step of a GUI session to a file, so a session that is cut short resumes where it stopped.
+
+    Each line is one JSON event and is flushed to disk before the next step is taken. Lookups and covers
+    do not need journaling: they are already kept by the response cache and the artwork store.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) the journal for appending.
+
+        Parameters
+        ----------
+        path: str
+            The location of the journal file, see path_for.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+        self.path = path
+        self.file = open(path, "a")
+        # end a line cut off by a crash, so the next event starts on a line of its own
+        if self.file.tell() > 0:
+            with open(path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    self.file.write("\n")
+
+    @staticmethod
+    def path_for(cache_directory, directory_path, review_queue_path = None):
+        """Returns the journal location for a session over the directory (and review queue, if any)."""
+        key = os.path.abspath(directory_path)
+        if review_queue_path is not None:
+            key += "\n" + os.path.abspath(review_queue_path)
+        return os.path.join(cache_directory, "sessions", hashlib.sha256(key.encode()).hexdigest() + ".jsonl")
+
+    @staticmethod
+    def replay(path):
+        """Returns the SessionState a journal leads to, or None if there is no journal to resume."""
+        if not os.path.isfile(path):
+            return None
+
+        state = SessionState()
+        with open(path) as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # a crash while writing leaves a line cut off, the events around it are intact
+                    continue
+
+                kind = event["event"]
+                if kind == "songs":
+                    state.songs.extend(event["paths"])
+                elif kind == "scanned":
+                    state.scanned = True
+                elif kind == "decided":
+                    state.job = event["job"]
+                    state.job_stage = event["stage"]
+                    state.allowed_tags.update(event.get("allowed_tags", []))
+                elif kind == "queued":
+                    state.pending_writes[event["job"]["filepath"]] = event["job"]
+                    state.index = event["index"] + 1
+                    state.job = None
+                    state.job_stage = None
+                elif kind == "written":
+                    state.pending_writes.pop(event["path"], None)
+
+        if not state.songs and not state.pending_writes:
+            return None
+        return state
+
+    def append(self, event, **fields):
+        """Writes an event and makes sure it reached the disk."""
+        fields["event"] = event
+        self.file.write(json.dumps(fields) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def finish(self):
+        """Closes and deletes the journal once its session is complete, so it is not resumed again."""
+        self.file.close()
+        os.remove(self.path)
@@ -4,24 +4,14 @@ import tkinter
 class TagSelection(ctk.CTkFrame):
     """Holds the UI to display the tag selection dialog."""
 
-    def __init__(self, master, title, artist, tags, allowed, denied, on_click_continue):
+    def __init__(self, master, on_click_continue):
         """
-        Initializes UI components.
+        Initializes UI components. Call refresh() to fill them in for a track.
 
         Parameters
         ----------
         master: CTk | CTkFrame
             Parent container of this frame.
-        title: str
-            The title of the track.
-        artist: str
-            The artist of the track.
-        tags: List[str]
-            List of tags for this track from last.fm.
-        allowed: List[str]
-            List of user-provided tags to automatically accept.
-        denied: List[str]
-            List of user-provided tags to automatically deny.
         on_click_continue: Callable[]
             Defines on-click behavior for the continue button.
         """
@@ -30,30 +20,15 @@ class TagSelection(ctk.CTkFrame):
         # center items horizontally
         self.columnconfigure(index = 0, weight = 1)
 
-        self.message_label = ctk.CTkLabel(master = self, text = f"Select tags for {title} by {artist}.")
+        self.message_label = ctk.CTkLabel(master = self, text = "")
         self.message_label.grid(row = 0, column = 0, padx = 20, pady = 20, sticky = "w")
 
         self.sub_frame = ctk.CTkFrame(self)
         self.sub_frame.grid(row = 1, column = 0, padx = 20, pady = (0, 20), sticky = "ew")
 
+        # checkboxes are kept between tracks and only created when a track has more tags than ever before
         self.checkboxes = []
-        for tag in tags:
-            if tag in denied:
-                state = tkinter.DISABLED
-            else:
-                state = tkinter.NORMAL
-
-            checkbox = ctk.CTkCheckBox(master = self.sub_frame, text = tag, state = state)
-
-            # denied tags take precedence, should not be disabled and selected
-            if state is not tkinter.DISABLED and tag in allowed:
-                checkbox.select()
-            self.checkboxes.append(checkbox)
-
-        row_counter = 0
-        for box in self.checkboxes:
-            box.grid(row = row_counter, column = 0, padx = 20, pady = 5, sticky = "w")
-            row_counter = row_counter + 1
+        self.tag_count = 0
 
         self.custom_tags_label = ctk.CTkLabel(master = self, text = "Add custom tags using a comma-separated list:")
         self.custom_tags_label.grid(row = 2, column = 0, padx = 20, sticky = "w")
@@ -64,9 +39,49 @@ class TagSelection(ctk.CTkFrame):
         self.continue_button = ctk.CTkButton(master = self, text = "continue", command = on_click_continue)
         self.continue_button.grid(row = 4, column = 0, padx = 20, pady = 20)
 
+    def refresh(self, title, artist, tags, allowed, denied):
+        """
+        Updates the page in place instead of building a new one.
+
+        Parameters
+        ----------
+        title: str
+            The title of the track.
+        artist: str
+            The artist of the track.
+        tags: List[str]
+            List of tags for this track from last.fm.
+        allowed: List[str]
+            List of user-provided tags to automatically accept.
+        denied: List[str]
+            List of user-provided tags to automatically deny.
+        """
+        self.message_label.configure(text = f"Select tags for {title} by {artist}.")
+
+        while len(self.checkboxes) < len(tags):
+            self.checkboxes.append(ctk.CTkCheckBox(master = self.sub_frame, text = ""))
+
+        for row_counter, tag in enumerate(tags):
+            checkbox = self.checkboxes[row_counter]
+            checkbox.configure(state = tkinter.NORMAL, text = tag)
+            checkbox.deselect()
+
+            # denied tags take precedence, should not be disabled and selected
+            if tag in denied:
+                checkbox.configure(state = tkinter.DISABLED)
+            elif tag in allowed:
+                checkbox.select()
+            checkbox.grid(row = row_counter, column = 0, padx = 20, pady = 5, sticky = "w")
+
+        for checkbox in self.checkboxes[len(tags):]:
+            checkbox.grid_remove()
+        self.tag_count = len(tags)
+
+        self.custom_tags_entry.delete(0, "end")
+
     def get_selected_tags(self):
         tags = []
-        for checkbox in self.checkboxes:
+        for checkbox in self.checkboxes[:self.tag_count]:
             if checkbox.get() == 1:
                 tags.append(checkbox.cget("text"))
 
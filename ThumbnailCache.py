@@ -0,0 +1,98 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from PIL import Image
+from Instrumentation import instrumentation
+
+class ThumbnailCache:
+    """Keeps decoded, pre-scaled covers in memory so screens can be redrawn without decoding full-size images again."""
+
+    def __init__(self, max_bytes = 16 * 1024 * 1024):
+        """
+        Initializes an empty cache.
+
+        Parameters
+        ----------
+        max_bytes: int
+            The total size of decoded pixels kept before least recently used thumbnails are dropped.
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # (sha256, (width, height)) -> Image
+        self.thumbnails = OrderedDict()
+        # decoding happens on AlbumSelection's worker threads
+        self.lock = threading.Lock()
+
+    def peek(self, sha256, size):
+        """Returns the thumbnail if it is already cached, without decoding anything. Otherwise returns None."""
+        key = (sha256, tuple(size))
+        with self.lock:
+            thumbnail = self.thumbnails.get(key)
+            if thumbnail is not None:
+                self.thumbnails.move_to_end(key)
+                self.hits += 1
+                instrumentation.count("thumbnails.hits")
+            return thumbnail
+
+    def get(self, cover, size, sha256 = None):
+        """
+        Returns the cover decoded and scaled to fit within size.
+
+        Parameters
+        ----------
+        cover: bytes
+            The encoded cover.
+        size: Tuple[int, int]
+            The largest width and height of the thumbnail, e.g. (100, 100) or (150, 150).
+        sha256: str | None
+            The cover's SHA-256 if already known, saves hashing the bytes.
+        """
+        if sha256 is None:
+            sha256 = hashlib.sha256(cover).hexdigest()
+        key = (sha256, tuple(size))
+        with self.lock:
+            thumbnail = self.thumbnails.get(key)
+            if thumbnail is not None:
+                self.thumbnails.move_to_end(key)
+                self.hits += 1
+                instrumentation.count("thumbnails.hits")
+                return thumbnail
+            self.misses += 1
+            instrumentation.count("thumbnails.misses")
+
+        with instrumentation.span("decode", size = f"{size[0]}x{size[1]}"):
+            thumbnail = Image.open(BytesIO(cover))
+            # draft lets the JPEG decoder skip most of the work for a large reduction
+            thumbnail.draft("RGB", size)
+            thumbnail.thumbnail(size)
+            thumbnail.load()
+
+        with self.lock:
+            if key not in self.thumbnails:
+                self.thumbnails[key] = thumbnail
+                self.size += self.memory_size(thumbnail)
+                while self.size > self.max_bytes and len(self.thumbnails) > 1:
+                    _, evicted = self.thumbnails.popitem(last = False)
+                    self.size -= self.memory_size(evicted)
+                    self.evictions += 1
+        return thumbnail
+
+    @staticmethod
+    def memory_size(image):
+        """Returns roughly how many bytes the decoded image occupies."""
+        return image.width * image.height * len(image.getbands())
+
+    def stats(self):
+        """Returns the hit, miss, and eviction counters along with the current size."""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.thumbnails),
+                "bytes": self.size
+            }
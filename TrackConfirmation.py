@@ -3,20 +3,14 @@ import customtkinter as ctk
 class TrackConfirmation(ctk.CTkFrame):
     """Holds the UI to display a confirmation dialog for a given track."""
 
-    def __init__(self, master, title, artist, playcount, on_click_yes, on_click_no):
+    def __init__(self, master, on_click_yes, on_click_no):
         """
-        Initializes UI components.
+        Initializes UI components. Call refresh() to fill them in for a track.
 
         Parameters
         ----------
         master: CTk | CTkFrame
             Parent container of this frame.
-        title: str
-            The title of the track.
-        artist: str
-            The artist of the track.
-        playcount: int
-            The number of plays for this song. -1 indicates manual entry (not from last.fm).
         on_click_yes: Callable[]
             Defines on-click behavior for accepting the track.
         on_click_no: Callable[]
@@ -27,10 +21,7 @@ class TrackConfirmation(ctk.CTkFrame):
         # center items horizontally
         self.grid_columnconfigure(0, weight = 1)
 
-        if playcount == -1:
-            self.message_label = ctk.CTkLabel(master = self, text = f"Accept existing title and artist {title} by {artist}?")
-        else:
-            self.message_label = ctk.CTkLabel(master = self, text = f"Accept track {title} by {artist} with {playcount} plays?")
+        self.message_label = ctk.CTkLabel(master = self, text = "")
         self.message_label.grid(row = 0, column = 0, padx = 20, pady = 20)
 
         self.sub_frame = ctk.CTkFrame(self)
@@ -41,3 +32,27 @@ class TrackConfirmation(ctk.CTkFrame):
 
         self.yes_button = ctk.CTkButton(master = self.sub_frame, text = "yes", command = on_click_yes)
         self.yes_button.grid(row = 0, column = 1, padx = 20, pady = 20)
+
+    def refresh(self, title, artist, playcount, corrected_from = None):
+        """
+        Updates the page in place instead of building a new one.
+
+        Parameters
+        ----------
+        title: str
+            The title of the track.
+        artist: str
+            The artist of the track.
+        playcount: int
+            The number of plays for this song. -1 indicates manual entry (not from last.fm).
+        corrected_from: Tuple[str, str] | None
+            The title and artist that were searched first and found nothing, if the track was found by correcting them.
+        """
+        if playcount == -1:
+            text = f"Accept existing title and artist {title} by {artist}?"
+        else:
+            text = f"Accept track {title} by {artist} with {playcount} plays?"
+        # the user should know this is not what the file asked for
+        if corrected_from is not None:
+            text += f"\nNothing was found for {corrected_from[0]} by {corrected_from[1]}, this is the closest track known locally."
+        self.message_label.configure(text = text)
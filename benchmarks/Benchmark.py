@@ -0,0 +1,327 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# the benchmarks drive the application's modules directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HttpClient import HttpClient
+from LastFM import LastFM
+from LastFMProvider import LastFMProvider
+from ResponseCache import ResponseCache
+from ArtworkStore import ArtworkStore
+from ArtworkNormalizer import ArtworkNormalizer
+from LibraryIndex import LibraryIndex
+from Scanner import Scanner
+from MetadataWriter import MetadataWriter
+from Prefetcher import prepare_all
+from Batch import run_batch
+from Instrumentation import instrumentation
+from StandInServer import StandInServer
+from Corpus import generate_corpus
+
+STAGES = ["scan", "lookup-cold", "lookup-warm", "lookup-async", "write", "batch"]
+
+class TimedLastFM(LastFM):
+    """Records how long every request takes, cache hits included."""
+
+    def __init__(self, *arguments, **keywords):
+        super().__init__(*arguments, **keywords)
+        self.latencies = []
+
+    def request(self, parameters):
+        start = time.perf_counter()
+        try:
+            return super().request(parameters)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+class TimedMetadataWriter(MetadataWriter):
+    """Records how long every file takes to write."""
+
+    def __init__(self, *arguments, **keywords):
+        super().__init__(*arguments, **keywords)
+        self.latencies = []
+
+    def write(self, job):
+        start = time.perf_counter()
+        try:
+            super().write(job)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of values fall, by nearest rank."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+class Stage:
+    """Measures one benchmark stage: wall time, items handled, and peak memory allocated by Python."""
+
+    def __init__(self, name, track_memory):
+        self.name = name
+        self.track_memory = track_memory
+        self.items = 0
+        self.latencies = []
+        self.extra = {}
+
+    def __enter__(self):
+        if self.track_memory:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception_info):
+        self.seconds = time.perf_counter() - self.start
+        self.peak = None
+        if self.track_memory:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def result(self):
+        """Returns the measurements as a JSON-compatible dict."""
+        milliseconds = lambda value: None if value is None else round(value * 1000, 3)
+        result = {
+            "seconds": round(self.seconds, 4),
+            "items": self.items,
+            "throughput": round(self.items / self.seconds, 2) if self.seconds > 0 else None,
+            "p50_ms": milliseconds(percentile(self.latencies, 0.5)),
+            "p90_ms": milliseconds(percentile(self.latencies, 0.9)),
+            "p99_ms": milliseconds(percentile(self.latencies, 0.99)),
+            "peak_mib": None if self.peak is None else round(self.peak / (1024 * 1024), 2)
+        }
+        result.update(self.extra)
+        return result
+
+class Benchmark:
+    """Runs the benchmark stages against a stand-in server and a synthetic library in a scratch directory."""
+
+    def __init__(self, arguments, server, workspace):
+        self.arguments = arguments
+        self.server = server
+        self.workspace = workspace
+        self.corpus = os.path.join(workspace, "corpus")
+        self.songs = generate_corpus(self.corpus, arguments.songs, arguments.tagged, arguments.missing, arguments.file_size * 1024, arguments.seed)
+        self.results = {}
+
+    def fresh_cache(self, name):
+        """Returns a new, empty cache directory."""
+        directory = os.path.join(self.workspace, "cache-" + name)
+        shutil.rmtree(directory, ignore_errors = True)
+        return directory
+
+    def fresh_library(self, name):
+        """Returns the paths of a new copy of the corpus, for stages that modify the files."""
+        directory = os.path.join(self.workspace, "library-" + name)
+        shutil.rmtree(directory, ignore_errors = True)
+        shutil.copytree(self.corpus, directory)
+        return [os.path.join(directory, os.path.relpath(song, self.corpus)) for song in self.songs]
+
+    def client(self):
+        return HttpClient(max_connections = self.arguments.workers, backoff = 0.01)
+
+    def lastfm(self, client, cache):
+        return TimedLastFM("benchmark", client, endpoint = self.server.url, cache = cache, rate = self.arguments.rate)
+
+    def run(self, stages):
+        for name in stages:
+            # work a stage needs done beforehand is not measured
+            setup = getattr(self, "setup_" + name.replace("-", "_"), None)
+            if setup is not None:
+                setup()
+            method = getattr(self, "run_" + name.replace("-", "_"))
+            with Stage(name, not self.arguments.no_memory) as stage:
+                method(stage)
+            if stage.items:
+                self.results[name] = stage.result()
+                print(format_result(name, self.results[name]), flush = True)
+        return self.results
+
+    def run_scan(self, stage):
+        for _ in Scanner(self.corpus).start():
+            stage.items += 1
+
+    def lookup(self, stage, cache_directory):
+        client = self.client()
+        cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+        lastfm = self.lastfm(client, cache)
+        artwork_store = ArtworkStore(os.path.join(cache_directory, "artwork"), client)
+        found = 0
+        for job in prepare_all(LastFMProvider(lastfm), artwork_store, self.songs, workers = self.arguments.workers, search_existing = True):
+            stage.items += 1
+            found += job.found
+        stage.latencies = lastfm.latencies
+        stage.extra = {"found": found, "requests": len(lastfm.latencies), "retries": client.retries, "cache": cache.stats()}
+        cache.close()
+        artwork_store.close()
+        client.close()
+
+    def run_lookup_cold(self, stage):
+        self.lookup(stage, self.fresh_cache("lookup"))
+
+    def run_lookup_warm(self, stage):
+        # reuses the cache the cold run filled
+        self.lookup(stage, os.path.join(self.workspace, "cache-lookup"))
+
+    def run_lookup_async(self, stage):
+        try:
+            import asyncio
+            from AsyncLastFM import AsyncLastFM
+        except ImportError:
+            print("lookup-async: skipped, aiohttp is not installed")
+            return
+
+        cache_directory = self.fresh_cache("async")
+        cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+        async_lastfm = AsyncLastFM("benchmark", endpoint = self.server.url, cache = cache, concurrency = self.arguments.workers * 4, rate = self.arguments.rate, backoff = 0.01)
+        queries = [(os.path.basename(song).split(" - ")[0], os.path.splitext(os.path.basename(song))[0].split(" - ")[1]) for song in self.songs]
+
+        async def resolve():
+            async with async_lastfm:
+                async for query, data in async_lastfm.resolve_tracks(queries):
+                    stage.items += 1
+        asyncio.run(resolve())
+        stage.extra = {"cache": cache.stats()}
+        cache.close()
+
+    def setup_write(self):
+        """Looks up a fresh copy of the library, so only the writes are measured."""
+        songs = self.fresh_library("write")
+        cache_directory = self.fresh_cache("write")
+        self.write_client = self.client()
+        cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+        self.write_artwork_store = ArtworkStore(os.path.join(cache_directory, "artwork"), self.write_client)
+        lastfm = self.lastfm(self.write_client, cache)
+        self.write_jobs = [job for job in prepare_all(LastFMProvider(lastfm), self.write_artwork_store, songs, workers = self.arguments.workers, search_existing = True) if job.found]
+        cache.close()
+
+    def run_write(self, stage):
+        library_index = LibraryIndex(os.path.join(self.workspace, "cache-write", "library.sqlite3"))
+        normalizer = None
+        if self.arguments.cover_size > 0:
+            normalizer = ArtworkNormalizer(self.write_artwork_store, self.arguments.cover_size)
+        writer = TimedMetadataWriter(library_index, normalizer, workers = self.arguments.write_workers, max_pending = self.arguments.write_workers * 4)
+        for job in self.write_jobs:
+            writer.submit(job)
+        writer.close()
+        stage.items = writer.written
+        stage.latencies = writer.latencies
+        stage.extra = {"failed": writer.failed}
+        library_index.close()
+        self.write_artwork_store.close()
+        self.write_client.close()
+
+    def run_batch(self, stage):
+        songs = self.fresh_library("batch")
+        cache_directory = self.fresh_cache("batch")
+        client = self.client()
+        cache = ResponseCache(os.path.join(cache_directory, "responses.sqlite3"))
+        lastfm = self.lastfm(client, cache)
+        artwork_store = ArtworkStore(os.path.join(cache_directory, "artwork"), client)
+        library_index = LibraryIndex(os.path.join(cache_directory, "library.sqlite3"))
+        normalizer = None
+        if self.arguments.cover_size > 0:
+            normalizer = ArtworkNormalizer(artwork_store, self.arguments.cover_size)
+        review_queue_path = os.path.join(cache_directory, "review-queue.jsonl")
+        # run_batch reports every file, which would drown out the results
+        with contextlib.redirect_stdout(io.StringIO()):
+            written, queued = run_batch(LastFMProvider(lastfm), artwork_store, songs, {"rock", "indie"}, set(), review_queue_path, library_index, normalizer)
+        stage.items = written + queued
+        stage.latencies = lastfm.latencies
+        stage.extra = {"written": written, "queued": queued, "retries": client.retries}
+        library_index.close()
+        cache.close()
+        artwork_store.close()
+        client.close()
+
+def format_result(name, result):
+    """Returns one line summarizing a stage."""
+    line = f"{name:<13} {result['items']:>6} items {result['seconds']:>9.3f} s {result['throughput'] or 0:>10.1f} /s"
+    if result["p50_ms"] is not None:
+        line += f"   p50 {result['p50_ms']:.2f} ms  p90 {result['p90_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms"
+    if result["peak_mib"] is not None:
+        line += f"   peak {result['peak_mib']:.1f} MiB"
+    return line
+
+def compare(results, baseline, tolerance):
+    """Returns a description of every stage whose throughput dropped by more than tolerance against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or not previous.get("throughput") or result["throughput"] is None:
+            continue
+        change = result["throughput"] / previous["throughput"] - 1
+        if change < -tolerance:
+            regressions.append(f"{name}: {previous['throughput']} /s -> {result['throughput']} /s ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark TrackTagger's scan, lookup, and write paths against a local last.fm stand-in.")
+    parser.add_argument("--songs", type = int, default = 500, help = "number of mp3 files in the synthetic library")
+    parser.add_argument("--tagged", type = float, default = 0.5, help = "fraction of files that already have a title and artist")
+    parser.add_argument("--missing", type = float, default = 0.05, help = "fraction of files last.fm does not find")
+    parser.add_argument("--file-size", type = int, default = 512, help = "size of every file in KiB")
+    parser.add_argument("--latency", type = float, default = 0.05, help = "seconds the stand-in server waits before every response")
+    parser.add_argument("--jitter", type = float, default = 0.02, help = "up to this many seconds are added to the latency at random")
+    parser.add_argument("--error-rate", type = float, default = 0.0, help = "fraction of API calls answered with a retryable error")
+    parser.add_argument("--rate", type = float, default = 1000, help = "requests per second allowed by the client rate limiter (last.fm allows 5)")
+    parser.add_argument("--workers", type = int, default = 8, help = "lookup threads and connections")
+    parser.add_argument("--write-workers", type = int, default = 4, help = "writer threads")
+    parser.add_argument("--cover-size", type = int, default = 600, help = "normalize covers to this size before embedding, 0 to embed them unchanged")
+    parser.add_argument("--stages", default = ",".join(STAGES), help = f"comma-separated stages to run, from: {', '.join(STAGES)}")
+    parser.add_argument("--no-memory", action = "store_true", help = "skip tracemalloc, which slows every stage down")
+    parser.add_argument("--seed", type = int, default = 0, help = "seed for the corpus and the server's delays and errors")
+    parser.add_argument("--json", metavar = "FILE", help = "write the results to FILE")
+    parser.add_argument("--baseline", metavar = "FILE", help = "compare against results written earlier with --json, exiting with 1 on a regression")
+    parser.add_argument("--tolerance", type = float, default = 0.15, help = "largest throughput drop against the baseline that is not a regression")
+    parser.add_argument("--keep", action = "store_true", help = "keep the scratch directory and print its location")
+    arguments = parser.parse_args()
+
+    stages = [stage.strip() for stage in arguments.stages.split(",") if stage.strip()]
+    for stage in stages:
+        if stage not in STAGES:
+            parser.error(f"unknown stage {stage}")
+
+    server = StandInServer(arguments.latency, arguments.jitter, arguments.error_rate, seed = arguments.seed).start()
+    workspace = tempfile.mkdtemp(prefix = "tracktagger-benchmark-")
+    try:
+        benchmark = Benchmark(arguments, server, workspace)
+        print(f"{arguments.songs} songs, {arguments.latency * 1000:.0f} ms latency, {arguments.error_rate:.0%} errors")
+        results = benchmark.run(stages)
+    finally:
+        server.stop()
+        if arguments.keep:
+            print(f"scratch directory: {workspace}")
+        else:
+            shutil.rmtree(workspace, ignore_errors = True)
+
+    # where the time went across every stage, by the application's own instrumentation
+    print(instrumentation.report())
+    print(f"server: {server.stats()}")
+    print(f"max resident memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+    report = {"arguments": vars(arguments), "results": results}
+    if arguments.json is not None:
+        with open(arguments.json, "w") as file:
+            json.dump(report, file, indent = 2)
+
+    if arguments.baseline is not None:
+        with open(arguments.baseline) as file:
+            regressions = compare(results, json.load(file), arguments.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
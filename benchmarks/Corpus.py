@@ -0,0 +1,57 @@
+import os
+import random
+from mutagen.id3 import ID3, TIT2, TPE1
+from StandInServer import MISSING_PREFIX, ALBUM_SIZE
+
+# an MPEG-1 layer III frame, 128 kbps at 44.1 kHz, with silent audio
+FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+def generate_corpus(directory, songs, tagged_fraction = 0.5, missing_fraction = 0.05, file_size = 512 * 1024, seed = 0):
+    """
+    Writes a library of synthetic mp3 files laid out as `Artist N/Artist N Album/Track M - Artist N.mp3`.
+
+    Every folder holds one album of ALBUM_SIZE tracks, so album mode finds the whole tracklist.
+
+    Parameters
+    ----------
+    directory: str
+        Where the library is created. Must not exist yet.
+    songs: int
+        The number of files to write.
+    tagged_fraction: float
+        The fraction of files that already carry a title and artist in their ID3 tags.
+    missing_fraction: float
+        The fraction of files the stand-in server reports as not found.
+    file_size: int
+        The approximate size of every file in bytes, most of it audio frames.
+    seed: int
+        Makes the corpus repeatable between runs.
+
+    Returns
+    -------
+    List[str]
+        The paths of the files written.
+    """
+    os.makedirs(directory)
+    randomizer = random.Random(seed)
+    audio = FRAME * max(1, file_size // len(FRAME))
+    paths = []
+    for number in range(songs):
+        artist = f"Artist {number // ALBUM_SIZE}"
+        title = f"Track {number % ALBUM_SIZE + 1}"
+        if randomizer.random() < missing_fraction:
+            title = f"{MISSING_PREFIX} {title}"
+
+        album_directory = os.path.join(directory, artist, f"{artist} Album")
+        os.makedirs(album_directory, exist_ok = True)
+        path = os.path.join(album_directory, f"{title} - {artist}.mp3")
+        with open(path, "wb") as file:
+            file.write(audio)
+
+        if randomizer.random() < tagged_fraction:
+            tags = ID3()
+            tags.add(TIT2(encoding = 3, text = [title]))
+            tags.add(TPE1(encoding = 3, text = [artist]))
+            tags.save(path)
+        paths.append(path)
+    return paths
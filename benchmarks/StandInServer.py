@@ -0,0 +1,173 @@
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from io import BytesIO
+from urllib.parse import urlparse, parse_qs
+from PIL import Image
+
+# titles starting with this are reported as not found, Corpus uses it for a share of the files
+MISSING_PREFIX = "missing"
+# how many tracks every canned album has
+ALBUM_SIZE = 10
+
+class StandInServer:
+    """Answers the last.fm calls TrackTagger makes with canned JSON and covers, on a local port, for benchmarks."""
+
+    def __init__(self, latency = 0.0, jitter = 0.0, error_rate = 0.0, cover_size = 300, seed = 0):
+        """
+        Initializes the server. Nothing listens until start() is called.
+
+        Parameters
+        ----------
+        latency: float
+            Seconds every response is delayed by, like a round trip to last.fm.
+        jitter: float
+            Up to this many seconds are added to the latency at random.
+        error_rate: float
+            The fraction of API calls answered with an error worth retrying, half as last.fm
+            error 29 (rate limit exceeded) and half as HTTP 503.
+        cover_size: int
+            Width and height of the covers served, in pixels.
+        seed: int
+            Makes the delays and errors repeatable between runs.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+
+        # every album shares one cover image, the URL still differs per album
+        image = BytesIO()
+        Image.new("RGB", (cover_size, cover_size), (200, 60, 40)).save(image, "JPEG", quality = 90)
+        self.cover = image.getvalue()
+
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.errors = 0
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/2.0/"
+
+    def start(self):
+        """Starts serving on a free port in a background thread. Returns the server for chaining."""
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive, like the real API
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stand_in.handle(self)
+
+            def log_message(self, *arguments):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target = self.server.serve_forever, daemon = True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        """Returns the number of calls served per method and how many were errors."""
+        with self.lock:
+            return {"requests": dict(self.requests), "errors": self.errors}
+
+    def handle(self, handler):
+        """Answers one request after the configured delay."""
+        url = urlparse(handler.path)
+        parameters = {name: values[0] for name, values in parse_qs(url.query).items()}
+        method = "cover" if url.path.startswith("/covers/") else parameters.get("method", "")
+        with self.random_lock:
+            delay = self.latency + self.random.random() * self.jitter
+            failure = method != "cover" and self.random.random() < self.error_rate
+            status_failure = self.random.random() < 0.5
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            self.errors += failure
+        time.sleep(delay)
+
+        if failure and status_failure:
+            self.send(handler, 503, b"", "text/plain")
+        elif failure:
+            self.send_json(handler, {"error": 29, "message": "Rate limit exceeded"})
+        elif method == "cover":
+            self.send(handler, 200, self.cover, "image/jpeg")
+        elif method == "track.getInfo":
+            self.send_json(handler, self.track_info(parameters["track"], parameters["artist"]))
+        elif method == "album.getInfo":
+            self.send_json(handler, self.album_info(parameters["album"], parameters["artist"]))
+        elif method == "album.search":
+            self.send_json(handler, self.album_search(parameters["album"]))
+        else:
+            self.send_json(handler, {"error": 3, "message": "Invalid method"})
+
+    def send_json(self, handler, data):
+        self.send(handler, 200, json.dumps(data).encode(), "application/json")
+
+    def send(self, handler, status, body, content_type):
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def cover_url(self, album_title, artist):
+        key = zlib.crc32((album_title + "\n" + artist).encode())
+        return f"http://127.0.0.1:{self.server.server_address[1]}/covers/{key}.jpg"
+
+    def images(self, album_title, artist):
+        url = self.cover_url(album_title, artist)
+        return [{"#text": url, "size": size} for size in ("small", "medium", "large", "extralarge")]
+
+    def track_info(self, title, artist):
+        """Returns a track.getInfo response, every track is on an album named after the track's artist."""
+        if title.lower().startswith(MISSING_PREFIX):
+            return {"error": 6, "message": "Track not found"}
+        album_title = f"{artist} Album"
+        return {"track": {
+            "name": title,
+            "mbid": "",
+            "playcount": "12345",
+            "artist": {"name": artist, "mbid": ""},
+            "toptags": {"tag": [{"name": "Rock"}, {"name": "Indie"}, {"name": "seen live"}]},
+            "album": {
+                "title": album_title,
+                "artist": artist,
+                "mbid": "",
+                "image": self.images(album_title, artist),
+                "@attr": {"position": str(sum(map(ord, title)) % ALBUM_SIZE + 1)}
+            }
+        }}
+
+    def album_info(self, album_title, artist):
+        """Returns an album.getInfo response with a tracklist of ALBUM_SIZE tracks."""
+        return {"album": {
+            "name": album_title,
+            "artist": artist,
+            "mbid": "",
+            "image": self.images(album_title, artist),
+            "tags": {"tag": [{"name": "Rock"}, {"name": "Indie"}]},
+            "tracks": {"track": [
+                {"name": f"Track {position}", "artist": {"name": artist, "mbid": ""}, "@attr": {"rank": position}}
+                for position in range(1, ALBUM_SIZE + 1)
+            ]}
+        }}
+
+    def album_search(self, album_title):
+        """Returns an album.search response with five matches."""
+        return {"results": {"albummatches": {"album": [
+            {"name": f"{album_title} {number}", "artist": f"Artist {number}", "image": self.images(album_title, str(number))}
+            for number in range(5)
+        ]}}}
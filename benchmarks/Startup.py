@@ -0,0 +1,84 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what is started, as the arguments given to a fresh interpreter; the batch run is over an empty directory
+# so only startup and shutdown are measured
+COMMANDS = {
+    "help": ["Main.py", "--help"],
+    "batch": ["Main.py", "--batch", "{empty}"],
+    "gui-import": ["-c", "import Application"],
+    # needs a display, it is skipped without one
+    "gui-window": ["-c", "import Application; app = Application.Application('benchmark', '{cache}'); app.update(); app.destroy()"]
+}
+
+def time_command(arguments, environment):
+    """Returns how long a fresh interpreter takes to run the arguments and exit, in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + arguments, cwd = ROOT, env = environment, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL, check = True)
+    return time.perf_counter() - start
+
+def slowest_imports(arguments, environment, count):
+    """Returns the modules imported directly by the command that took the longest, with their cumulative time in ms."""
+    result = subprocess.run([sys.executable, "-X", "importtime"] + arguments, cwd = ROOT, env = environment, stdout = subprocess.DEVNULL, stderr = subprocess.PIPE, text = True)
+    imports = []
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        # "import time:  self | cumulative | name", nesting is shown by indenting the name
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        if not name.startswith("  ") and name.strip() != "site":
+            imports.append((int(fields[1]) / 1000, name.strip()))
+    return sorted(imports, reverse = True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description = "Measure how long TrackTagger takes to start in each mode, in fresh interpreters.")
+    parser.add_argument("--runs", type = int, default = 10, help = "times every command is started")
+    parser.add_argument("--commands", default = ",".join(COMMANDS), help = f"comma-separated commands to time, from: {', '.join(COMMANDS)}")
+    parser.add_argument("--imports", type = int, default = 0, metavar = "COUNT", help = "also list the COUNT slowest imports of every command")
+    parser.add_argument("--budget", type = float, default = 0.5, help = "seconds a median start may take before the run exits with 1")
+    arguments = parser.parse_args()
+
+    commands = [command.strip() for command in arguments.commands.split(",") if command.strip()]
+    for command in commands:
+        if command not in COMMANDS:
+            parser.error(f"unknown command {command}")
+
+    workspace = tempfile.mkdtemp(prefix = "tracktagger-startup-")
+    empty = os.path.join(workspace, "empty")
+    os.makedirs(empty)
+    environment = dict(os.environ, KEY = "benchmark", XDG_CACHE_HOME = os.path.join(workspace, "cache"))
+
+    over_budget = []
+    try:
+        for name in commands:
+            if name == "gui-window" and not os.environ.get("DISPLAY"):
+                print(f"{name}: skipped, there is no display")
+                continue
+            command = [argument.format(empty = empty, cache = os.path.join(workspace, "cache", "tracktagger")) for argument in COMMANDS[name]]
+            # the first start fills the OS file cache and writes bytecode, like every start after installing
+            time_command(command, environment)
+            times = [time_command(command, environment) for _ in range(arguments.runs)]
+            median = statistics.median(times)
+            print(f"{name:<11} median {median * 1000:>7.1f} ms   min {min(times) * 1000:>7.1f} ms   max {max(times) * 1000:>7.1f} ms")
+            for milliseconds, module in slowest_imports(command, environment, arguments.imports):
+                print(f"    {milliseconds:>7.1f} ms  {module}")
+            if median > arguments.budget:
+                over_budget.append(name)
+    finally:
+        shutil.rmtree(workspace, ignore_errors = True)
+
+    if over_budget:
+        print(f"over the {arguments.budget} s budget: {', '.join(over_budget)}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()